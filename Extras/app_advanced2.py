@@ -10,6 +10,12 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+import sys
+
+# Shared modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artifact_store import get_artifact_store
+from feature_store import calculate_macd, calculate_rsi, data_version
 
 app = Flask(__name__)
 
@@ -89,10 +95,12 @@ def generate_report():
     output_csv.seek(0)
 
     # Generate and save plots
-    plot_path_breakout = save_plot(data, breakout_days, results_breakout, ticker, "Breakout Strategy")
-    plot_path_crossover = save_plot(data, crossover_days, results_crossover, ticker, "SMA Crossover Strategy")
-    plot_path_risk = save_plot(data, breakout_days, results_breakout_risk, ticker, "Breakout Strategy with Risk Management")
-    plot_path_ml = save_plot(data, ml_results, results_ml, ticker, "ML Predicted Breakouts")
+    params = dict(start_date=start_date, end_date=end_date, volume_threshold=volume_threshold,
+                  price_change=price_change, holding_period=holding_period, data=data_version(data))
+    plot_path_breakout = save_plot(data, breakout_days, results_breakout, ticker, "Breakout Strategy", params)
+    plot_path_crossover = save_plot(data, crossover_days, results_crossover, ticker, "SMA Crossover Strategy", params)
+    plot_path_risk = save_plot(data, breakout_days, results_breakout_risk, ticker, "Breakout Strategy with Risk Management", params)
+    plot_path_ml = save_plot(data, ml_results, results_ml, ticker, "ML Predicted Breakouts", params)
 
     # HTML Response with Links to Visualizations and CSV Download
     return f'''
@@ -110,23 +118,6 @@ def generate_report():
         <a href="/{plot_path_ml}">View ML Predictions Plot</a><br><br>
     '''
 
-def calculate_rsi(series, period):
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def calculate_macd(series, short_period=12, long_period=26, signal_period=9):
-    short_ema = series.ewm(span=short_period, min_periods=1).mean()
-    long_ema = series.ewm(span=long_period, min_periods=1).mean()
-    macd = short_ema - long_ema
-    signal = macd.ewm(span=signal_period, min_periods=1).mean()
-    return macd, signal
-
 def calculate_returns(data, trade_days, holding_period, strategy_name, stop_loss=None, take_profit=None):
     results = []
     for trade_date in trade_days.index:
@@ -175,7 +166,13 @@ def calculate_metrics(results):
         metrics += f"Maximum Drawdown: {max_drawdown:.2f}%\n\n"
 
     return metrics
-def save_plot(data, trade_days, results, ticker, title):
+def save_plot(data, trade_days, results, ticker, title, params=None):
+    # Reuse the PNG of an identical earlier request
+    inputs = dict(params or {}, ticker=ticker, title=title)
+    return get_artifact_store().get_or_create(f"{ticker}_{title}", inputs, '.png',
+                                              lambda path: render_plot(data, trade_days, results, ticker, title, path))
+
+def render_plot(data, trade_days, results, ticker, title, plot_path):
     # Remove timezone information
     data.index = data.index.tz_localize(None)
 
@@ -205,7 +202,6 @@ def save_plot(data, trade_days, results, ticker, title):
     plt.grid(True)
 
     # Save plot
-    plot_path = f"static/{ticker}_{title.replace(' ', '_').lower()}.png"
     plt.savefig(plot_path)
     plt.close()
 
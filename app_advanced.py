@@ -1,155 +1,297 @@
-from flask import Flask, render_template, request, send_file, url_for
-import yfinance as yf
+from flask import Flask, abort, jsonify, redirect, render_template, request, send_file, url_for
 import pandas as pd
 import numpy as np
 from io import BytesIO
+import plotly
 import plotly.graph_objects as go
 import os
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
+from providers import get_provider
+from feature_store import data_version, get_feature_store
+from exit_engine import first_hit_exits
+from bootstrap import bootstrap_metrics
+from metrics import clean_trades, exit_ordered, strategy_metrics
+from model_registry import get_model_registry
+from forest_inference import forest_predict
+from pooled_model import POOLED_MODEL_PATH, load_pooled_model, predict_universe
+from report_store import get_report_store
+from jobs import get_job_queue
+from result_cache import get_result_cache, normalize_params
+from plotting import downsample_line, figure_payload, figure_response, plotly_js_response
+
+# Exit levels (%) for the risk-managed breakout strategy; None disables a rule
+RISK_MANAGEMENT = {'stop_loss': 1.5, 'take_profit': 3.0, 'trailing_stop': None}
+
+# 'full' refits the forest for every new data range; 'incremental' adds trees for appended bars;
+# 'pooled' serves the cross-ticker model trained by pooled_model.py
+ML_TRAINING = os.environ.get('ML_TRAINING', 'full')
+
+# 'sync' builds the report inside the request; 'async' queues it for background job workers
+REPORT_MODE = os.environ.get('REPORT_MODE', 'sync')
 
 app = Flask(__name__)
 
-output_csv = None
+def strategy_slug(strategy_name):
+    return strategy_name.replace(" ", "_").lower()
 
 @app.route('/', methods=['GET'])
 def home():
     return render_template('index.html')
 
-@app.route('/generate-report', methods=['POST'])
-def generate_report():
-    global output_csv
-
-    # Get form inputs
-    ticker = request.form['ticker']
-    start_date = request.form['start_date']
-    end_date = request.form['end_date']
-    volume_threshold = float(request.form['volume_threshold'])
-    price_change = float(request.form['price_change'])
-    holding_period = int(request.form['holding_period'])
+class ReportError(Exception):
+    """A report cannot be generated for the given inputs."""
+
+REPORT_STAGES = ['Fetching data', 'Computing indicators', 'Breakout strategy', 'SMA crossover strategy',
+                 'Risk-managed strategy', 'ML model', 'Metrics', 'Storing report']
+
+def report_params(form):
+    params = {
+        'ticker': form['ticker'],
+        'start_date': form['start_date'],
+        'end_date': form['end_date'],
+        'volume_threshold': float(form['volume_threshold']),
+        'price_change': float(form['price_change']),
+        'holding_period': int(form['holding_period']),
+    }
+    if params['holding_period'] < 0:
+        raise ReportError("Holding period must not be negative.")
+    return params
+
+def build_report(params, progress=lambda stage: None):
+    """Run the report pipeline, store its items and return the report ID.
+
+    ``progress`` is called with each of REPORT_STAGES as it starts. Results
+    for the same parameters and unchanged price data come from the result
+    cache, skipping straight to storing the report.
+    """
+    ticker = params['ticker']
 
     # Fetch historical data
-    stock = yf.Ticker(ticker)
-    data = stock.history(start=start_date, end=end_date)
+    progress('Fetching data')
+    data = get_provider().history(ticker, params['start_date'], params['end_date'])
     if data.empty:
-        return "<h2>No data found for the given ticker and date range.</h2>"
-
-    # Calculate technical indicators
-    data['20DayAvgVolume'] = data['Volume'].rolling(window=20).mean()
-    data['10DaySMA'] = data['Close'].rolling(window=10).mean()
-    data['50DaySMA'] = data['Close'].rolling(window=50).mean()
+        raise ReportError("No data found for the given ticker and date range.")
+
+    cache = get_result_cache()
+    # Every input of the results besides the price data: form, risk levels and the ML model in use
+    key = normalize_params(app='advanced', risk_management=RISK_MANAGEMENT, ml_training=ML_TRAINING,
+                           ml_model=ml_model_version(), **params)
+    version = data_version(data)
+    cached = cache.get(key, version)
+    if cached is None:
+        cached = compute_strategies(data, params, progress)
+        cache.put(key, version, cached)
+    combined_results, metrics, strategies = cached
+
+    # Report items are kept in the shared report store, so any worker can serve them
+    progress('Storing report')
+    store = get_report_store()
+    report_id = store.new_id()
+    store.put(report_id, 'csv', combined_results.to_csv(index=False).encode())
+
+    # Plots are built on demand by /plot from the report data stored here
+    store.put(report_id, 'plots', {'data': data[['Close']], 'strategies': strategies})
+    store.put(report_id, 'summary', {
+        'ticker': ticker,
+        'metrics': metrics,
+        'plots': [(name, slug) for slug, (name, _, _) in strategies.items()],
+    })
+    return report_id
+
+def ml_model_version():
+    """Identifies the pooled model in use, so cached results are dropped when it is retrained.
+
+    Per-ticker models are fitted from the report's own data, which the result
+    cache already checks.
+    """
+    if ML_TRAINING != 'pooled':
+        return None
+    try:
+        return os.path.getmtime(POOLED_MODEL_PATH)
+    except FileNotFoundError:
+        return None
+
+def compute_strategies(data, params, progress=lambda stage: None):
+    """Backtest every strategy on ``data``; returns the combined trades, their metrics and the plotted trades."""
+    ticker = params['ticker']
+    volume_threshold = params['volume_threshold']
+    price_change = params['price_change']
+    holding_period = params['holding_period']
+
+    # Technical indicators, computed once per ticker and data version
+    progress('Computing indicators')
+    indicators = get_feature_store().features(ticker, data, ['20DayAvgVolume', '10DaySMA', '50DaySMA', 'PriceChange'])
+    data = data.join(indicators)
 
     # Identify breakout points
     data['VolumeBreakout'] = data['Volume'] > (volume_threshold / 100) * data['20DayAvgVolume']
-    data['PriceChange'] = data['Close'].pct_change() * 100
     data['PriceBreakout'] = data['PriceChange'] > price_change
 
     # Breakout Strategy
+    progress('Breakout strategy')
     breakout_days = data[(data['VolumeBreakout']) & (data['PriceBreakout'])]
     results_breakout = calculate_returns(data, breakout_days, holding_period, "Breakout Strategy")
 
     # SMA Crossover Strategy
+    progress('SMA crossover strategy')
     data['SMA_Crossover_Buy'] = (data['10DaySMA'] > data['50DaySMA']) & (data['10DaySMA'].shift(1) <= data['50DaySMA'].shift(1))
     crossover_days = data[data['SMA_Crossover_Buy']]
     results_crossover = calculate_returns(data, crossover_days, holding_period, "SMA Crossover Strategy")
 
     # Breakout Strategy with Risk Management
-    results_breakout_risk = calculate_returns(data, breakout_days, holding_period, "Breakout Strategy with Risk Management", stop_loss=1.5, take_profit=3.0)
+    progress('Risk-managed strategy')
+    results_breakout_risk = calculate_returns(data, breakout_days, holding_period, "Breakout Strategy with Risk Management", **RISK_MANAGEMENT)
 
     # ML Predicted Breakouts
-    ml_results = predict_breakouts_with_ml(data)
+    progress('ML model')
+    ml_results = predict_breakouts_with_ml(data, ticker, volume_threshold, price_change)
     results_ml = calculate_returns(data, ml_results, holding_period, "ML Predicted Breakouts")
 
-    combined_results = pd.concat([
-        pd.DataFrame([{"Strategy": "--- Breakout Strategy ---"}]), results_breakout,
-        pd.DataFrame([{"Strategy": "--- SMA Crossover Strategy ---"}]), results_crossover,
-        pd.DataFrame([{"Strategy": "--- Breakout Strategy with Risk Management ---"}]), results_breakout_risk,
-        pd.DataFrame([{"Strategy": "--- ML Predicted Breakouts ---"}]), results_ml
-    ], ignore_index=True)
-
-    output_csv = BytesIO()
-    combined_results.to_csv(output_csv, index=False)
-    output_csv.seek(0)
-
-    plot_path_breakout = create_plotly_plot(data, breakout_days, "Breakout Strategy", results_breakout)
-    plot_path_risk = create_plotly_plot(data, breakout_days, "Breakout Strategy with Risk Management", results_breakout_risk)
-    plot_path_crossover = create_plotly_plot(data, crossover_days, "SMA Crossover Strategy", results_crossover)
-    plot_path_ml = create_plotly_plot(data, ml_results, "ML Predicted Breakouts", results_ml)
-
-    metrics = calculate_metrics(combined_results)
-
+    combined_results = pd.concat([results_breakout, results_crossover, results_breakout_risk, results_ml],
+                                 ignore_index=True)
+
+    progress('Metrics')
+    metrics = calculate_metrics(combined_results, data)
+
+    strategies = {
+        strategy_slug(name): (name, trade_days[['Close']], results)
+        for name, trade_days, results in [
+            ("Breakout Strategy", breakout_days, results_breakout),
+            ("SMA Crossover Strategy", crossover_days, results_crossover),
+            ("Breakout Strategy with Risk Management", breakout_days, results_breakout_risk),
+            ("ML Predicted Breakouts", ml_results, results_ml),
+        ]
+    }
+    return combined_results, metrics, strategies
+
+def report_queue():
+    """The job queue, set up on first use so that merely importing this module leaves it alone.
+
+    In async mode this also starts the process's job workers, so any process
+    serving the app can run reports queued by another.
+    """
+    queue = get_job_queue()
+    queue.register('report', build_report, REPORT_STAGES)
+    if REPORT_MODE == 'async':
+        queue.start()
+    return queue
+
+def render_report(report_id):
+    summary = get_report_store().get(report_id, 'summary')
+    if summary is None:
+        abort(404)
     return render_template('report.html',
-                           ticker=ticker,
-                           metrics=metrics,
-                           breakout_plot=plot_path_breakout,
-                           crossover_plot=plot_path_crossover,
-                           breakout_risk_plot=plot_path_risk,
-                           ml_plot=plot_path_ml,
-                           download_link=url_for('download_csv'))
-
-def calculate_returns(data, trade_days, holding_period, strategy_name, stop_loss=None, take_profit=None):
-    results = []
-    for trade_date in trade_days.index:
-        buy_price = data.at[trade_date, 'Close']
-        sell_date = trade_date + pd.Timedelta(days=holding_period)
-        sell_price = data.at[sell_date, 'Close'] if sell_date in data.index else None
-
-        if stop_loss and take_profit:
-            for i in range(holding_period):
-                current_date = trade_date + pd.Timedelta(days=i)
-                if current_date in data.index:
-                    current_price = data.at[current_date, 'Close']
-                    change = ((current_price - buy_price) / buy_price) * 100
-                    if change <= -stop_loss or change >= take_profit:
-                        sell_date = current_date
-                        sell_price = current_price
-                        break
-
-        return_percent = ((sell_price - buy_price) / buy_price) * 100 if sell_price else None
-        results.append({
-            'Strategy': strategy_name,
-            'Breakout Date': trade_date.date(),
-            'Buy Price': buy_price,
-            'Sell Date': sell_date.date() if sell_price else None,
-            'Sell Price': sell_price,
-            'Return (%)': return_percent
-        })
-    return pd.DataFrame(results)
-
-def calculate_metrics(results):
-    metrics = ""
-    strategies = results['Strategy'].unique()
-    for strategy in strategies:
-        if strategy.startswith("---"):
-            continue
-        strategy_results = results[results['Strategy'] == strategy]
-        returns = strategy_results['Return (%)'].dropna()
-
-        win_rate = (returns > 0).mean() * 100 if not returns.empty else 0
-        avg_return = returns.mean() if not returns.empty else 0
-        max_drawdown = (returns.cumsum().cummax() - returns.cumsum()).max() if not returns.empty else 0
-
-        metrics += f"{strategy}\n"
-        metrics += f"Win Rate: {win_rate:.2f}%\n"
-        metrics += f"Average Return: {avg_return:.2f}%\n"
-        metrics += f"Maximum Drawdown: {max_drawdown:.2f}%\n\n"
+                           ticker=summary['ticker'],
+                           metrics=summary['metrics'],
+                           plots=[(name, url_for('plot', report_id=report_id, strategy=slug))
+                                  for name, slug in summary['plots']],
+                           plotly_js=url_for('plotly_js', version=plotly.__version__),
+                           download_link=url_for('download_csv', report_id=report_id))
+
+@app.route('/generate-report', methods=['POST'])
+def generate_report():
+    try:
+        params = report_params(request.form)
+    except ReportError as e:
+        return f"<h2>{e}</h2>", 400
+    if REPORT_MODE == 'async':
+        job_id = report_queue().submit('report', params)
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+        return redirect(url_for('job', job_id=job_id))
+
+    try:
+        report_id = build_report(params)
+    except ReportError as e:
+        return f"<h2>{e}</h2>"
+    return render_report(report_id)
+
+@app.route('/report/<report_id>')
+def report(report_id):
+    return render_report(report_id)
+
+@app.route('/jobs/<job_id>')
+def job(job_id):
+    if report_queue().status(job_id) is None:
+        abort(404)
+    return render_template('job.html', status_url=url_for('job_status', job_id=job_id))
+
+@app.route('/jobs/<job_id>/status')
+def job_status(job_id):
+    status = report_queue().status(job_id)
+    if status is None:
+        abort(404)
+    if status['status'] == 'done':
+        status['report_url'] = url_for('report', report_id=status['result'])
+    return jsonify(status)
+
+def calculate_returns(data, trade_days, holding_period, strategy_name, stop_loss=None, take_profit=None, trailing_stop=None):
+    # Holding period and risk levels are in trading days (bars); all trades are resolved at once
+    close = data['Close'].to_numpy()
+    entry_positions = data.index.get_indexer(trade_days.index)
+    entry_positions = entry_positions[entry_positions >= 0]
+    exit_positions, _ = first_hit_exits(close, entry_positions, holding_period, stop_loss, take_profit, trailing_stop)
+
+    has_exit = exit_positions >= 0
+    buy_price = close[entry_positions]
+    sell_price = np.where(has_exit, close[exit_positions], np.nan)
+    sell_date = np.where(has_exit, data.index[exit_positions].date, None)
+    return pd.DataFrame({
+        'Strategy': strategy_name,
+        'Breakout Date': data.index[entry_positions].date,
+        'Buy Price': buy_price,
+        'Sell Date': sell_date,
+        'Sell Price': sell_price,
+        'Return (%)': (sell_price - buy_price) / buy_price * 100
+    })
+
+def calculate_metrics(results, data):
+    # One grouped pass over all strategies, plus bootstrap intervals per strategy
+    metrics = strategy_metrics(results, data.index[0].date(), data.index[-1].date())
+    for strategy, returns in exit_ordered(clean_trades(results)).groupby('Strategy', sort=False)['Return (%)']:
+        for name, (_, low, high) in bootstrap_metrics(returns).items():
+            label = name.replace(" (%)", "")
+            metrics.loc[strategy, f"{label} 95% CI Low (%)"] = low
+            metrics.loc[strategy, f"{label} 95% CI High (%)"] = high
     return metrics
 
-def predict_breakouts_with_ml(data):
+ML_FEATURES = ['Close', 'Volume', '20DayAvgVolume', '10DaySMA', '50DaySMA']
+ML_PARAMS = {'n_estimators': 200, 'max_depth': 10, 'random_state': 42}
+
+def predict_breakouts_with_ml(data, ticker, volume_threshold, price_change):
+    if ML_TRAINING == 'pooled':
+        bundle = load_pooled_model()
+        # The pooled model only predicts breakouts as defined by the thresholds it was trained with
+        if bundle is not None and (bundle['volume_threshold'], bundle['price_change']) == (volume_threshold, price_change):
+            predictions = predict_universe({ticker: data}, bundle)
+            return data.loc[predictions.index[predictions['Predicted']]]
+        if bundle is None:
+            print("No pooled model found, training a model for this ticker")
+        else:
+            print(f"Pooled model was trained for volume threshold {bundle['volume_threshold']} and price change "
+                  f"{bundle['price_change']}, training a model for this ticker")
+
     data = data.dropna()
-    X = data[['Close', 'Volume', '20DayAvgVolume', '10DaySMA', '50DaySMA']]
+    X = data[ML_FEATURES]
     y = ((data['VolumeBreakout']) & (data['PriceBreakout'])).astype(int)
-    model = RandomForestClassifier(n_estimators=200, max_depth=10, random_state=42)
-    model.fit(X, y)
-    data['ML_Predicted_Breakout'] = model.predict(X)
+    # Reuse the fitted forest when ticker, data, features and parameters are unchanged
+    registry = get_model_registry()
+    if ML_TRAINING == 'incremental':
+        model = registry.get_or_update(ticker, X, y, RandomForestClassifier, ML_PARAMS)
+    else:
+        model = registry.get_or_fit(ticker, X, y, RandomForestClassifier, ML_PARAMS)
+    data['ML_Predicted_Breakout'] = forest_predict(model, X)
     return data[data['ML_Predicted_Breakout'] == 1]
 
 def create_plotly_plot(data, trade_days, strategy_name, results):
     fig = go.Figure()
 
+    # Long ranges are downsampled; bars with buy or sell markers are always kept
+    price = downsample_line(data['Close'], [*trade_days.index, *results['Sell Date'].dropna()])
     fig.add_trace(go.Scatter(
-        x=data.index, 
-        y=data['Close'], 
+        x=price.index, 
+        y=price, 
         mode='lines', 
         name='Stock Price', 
         line=dict(color='blue')
@@ -178,17 +320,36 @@ def create_plotly_plot(data, trade_days, strategy_name, results):
         xaxis_title="Date",
         yaxis_title="Price",
         template="plotly_dark",
-        showlegend=True
+        showlegend=True,
+        meta=strategy_name
     )
 
-    plot_path = f'static/{strategy_name.replace(" ", "_").lower()}.html'
-    fig.write_html(plot_path)
-
-    return plot_path
-
-@app.route('/download-csv')
-def download_csv():
-    return send_file(output_csv, download_name="combined_strategy_report.csv", as_attachment=True)
+    return fig
+
+@app.route('/plot/<report_id>/<strategy>')
+def plot(report_id, strategy):
+    store = get_report_store()
+    # Built on first request only and stored with the report; its data never changes afterwards
+    payload = store.get(report_id, f'figure:{strategy}')
+    if payload is None:
+        report = store.get(report_id, 'plots')
+        if report is None or strategy not in report['strategies']:
+            abort(404)
+        strategy_name, trade_days, results = report['strategies'][strategy]
+        payload = figure_payload(create_plotly_plot(report['data'], trade_days, strategy_name, results))
+        store.put(report_id, f'figure:{strategy}', payload)
+    return figure_response(payload)
+
+@app.route('/assets/plotly-<version>.min.js')
+def plotly_js(version):
+    return plotly_js_response(version)
+
+@app.route('/download-csv/<report_id>')
+def download_csv(report_id):
+    csv = get_report_store().get(report_id, 'csv')
+    if csv is None:
+        abort(404)
+    return send_file(BytesIO(csv), mimetype='text/csv', download_name="combined_strategy_report.csv", as_attachment=True)
 
 if __name__ == '__main__':
     app.run(debug=True)
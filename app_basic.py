@@ -1,22 +1,25 @@
 from flask import Flask, render_template, request, send_file, url_for
-import yfinance as yf
 import pandas as pd
 from io import BytesIO
 import plotly.graph_objects as go
-from pandas.tseries.offsets import CustomBusinessDay
-from pandas.tseries.holiday import USFederalHolidayCalendar
 import traceback
+from providers import get_provider
+from scanner import SCAN_MAX_TICKERS, parse_tickers, scan_universe
+from exit_engine import trading_day_exits, trades_frame
+from bootstrap import bootstrap_metrics
+from metrics import exit_ordered
+from plotting import downsample_line
+from artifact_store import get_artifact_store
+from feature_store import data_version
+from report_store import get_report_store
+from result_cache import get_result_cache, normalize_params
 
 app = Flask(__name__)
 
-# Define a custom business day with US federal holidays
-us_bd = CustomBusinessDay(calendar=USFederalHolidayCalendar())
-
 def fetch_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    """Fetch historical stock data using yfinance."""
+    """Fetch historical stock data, using the configured market data provider."""
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start_date, end=end_date)
+        data = get_provider().history(ticker, start_date, end_date)
         print(f"Fetched data for {ticker} from {start_date} to {end_date}")
         print(data.head())
         return data
@@ -39,52 +42,35 @@ def identify_breakouts(data: pd.DataFrame, volume_threshold: float, price_change
         return pd.DataFrame()
 
 def calculate_returns(data: pd.DataFrame, breakout_days: pd.DataFrame, holding_period: int, waiting_period: int, strategy_name: str) -> pd.DataFrame:
-    """Calculate returns for each breakout based on the holding period and waiting period."""
-    results = []
-
-    for breakout_date in breakout_days.index:
-        # Calculate the Buy Date: Breakout Date + Waiting Period
-        buy_date = breakout_date + waiting_period * us_bd
-
-        # Ensure the Buy Date is within the data range
-        if buy_date not in data.index or buy_date >= data.index[-1]:
-            continue
-
-        buy_price = data.at[buy_date, 'Close']
-
-        # Calculate the initial Sell Date: Buy Date + Holding Period (40 trading days)
-        sell_date = buy_date + holding_period * us_bd
-
-        # If Sell Date is not in the data, find the next valid trading day
-        while sell_date not in data.index and sell_date <= data.index[-1]:
-            sell_date += us_bd
-
-        # Ensure the final Sell Date is within the data range
-        if sell_date not in data.index:
-            print(f"No valid Sell Date found for breakout on {breakout_date}")
-            continue
-
-        sell_price = data.at[sell_date, 'Close']
-        return_percent = ((sell_price - buy_price) / buy_price) * 100
-
-        results.append({
-            'Strategy': strategy_name,
-            'Breakout Date': breakout_date.date(),
-            'Buy Date': buy_date.date(),
-            'Buy Price': buy_price,
-            'Sell Date': sell_date.date(),
-            'Sell Price': sell_price,
-            'Return (%)': return_percent
-        })
-
-    return pd.DataFrame(results)
-
-def create_plot(data: pd.DataFrame, results: pd.DataFrame, ticker: str, title: str) -> str:
-    """Create a Plotly plot showing buy and sell points on the stock price chart."""
+    """Calculate returns for each breakout based on the holding period and waiting period.
+
+    Periods count trading days (bars in the data), so the Buy Date is the bar
+    ``waiting_period`` bars after the breakout and the Sell Date the bar
+    ``holding_period`` bars after that. All trades are resolved in one pass.
+    """
+    signal_positions = data.index.get_indexer(breakout_days.index)
+    signal_positions, buy_positions, sell_positions = trading_day_exits(
+        len(data), signal_positions[signal_positions >= 0], waiting_period, holding_period)
+    return trades_frame(data, signal_positions, buy_positions, sell_positions, strategy_name)
+
+def create_plot(data: pd.DataFrame, results: pd.DataFrame, ticker: str, title: str, params: dict = None) -> str:
+    """Create a Plotly plot showing buy and sell points on the stock price chart.
+
+    The plot is stored as an artifact named by its inputs (ticker, title, data
+    version and the request ``params``), so an identical request reuses it.
+    """
+    inputs = dict(params or {}, ticker=ticker, title=title, data=data_version(data))
+    return get_artifact_store().get_or_create(f"{ticker}_{title}", inputs, '.html',
+                                              lambda path: _render_plot(data, results, ticker, title, path))
+
+def _render_plot(data: pd.DataFrame, results: pd.DataFrame, ticker: str, title: str, plot_path: str) -> None:
+    """Write the buy and sell point plot to ``plot_path`` as HTML."""
     fig = go.Figure()
 
-    # Plot stock price
-    fig.add_trace(go.Scatter(x=data.index, y=data['Close'], mode='lines', name='Stock Price'))
+    # Plot stock price, downsampled on long ranges but keeping every buy and sell bar
+    valid_sell_trades = results[results['Sell Date'] != 'N/A']
+    price = downsample_line(data['Close'], [*results['Buy Date'].dropna(), *valid_sell_trades['Sell Date']])
+    fig.add_trace(go.Scatter(x=price.index, y=price, mode='lines', name='Stock Price'))
 
     # Plot buy points
     buy_dates = pd.to_datetime(results['Buy Date'].dropna(), errors='coerce')
@@ -93,7 +79,6 @@ def create_plot(data: pd.DataFrame, results: pd.DataFrame, ticker: str, title: s
                              marker=dict(color='green', symbol='triangle-up', size=10)))
 
     # Plot sell points for valid trades
-    valid_sell_trades = results[results['Sell Date'] != 'N/A']
     sell_dates = pd.to_datetime(valid_sell_trades['Sell Date'], errors='coerce')
     sell_prices = valid_sell_trades['Sell Price'].dropna()
     fig.add_trace(go.Scatter(x=sell_dates, y=sell_prices, mode='markers', name='Sell Point',
@@ -109,9 +94,7 @@ def create_plot(data: pd.DataFrame, results: pd.DataFrame, ticker: str, title: s
     )
 
     # Save plot as HTML
-    plot_path = f'static/{ticker}_{title.replace(" ", "_").lower()}.html'
     fig.write_html(plot_path)
-    return plot_path
 
 def calculate_performance_metrics(results: pd.DataFrame) -> dict:
     """Calculate and return performance metrics for the strategy."""
@@ -125,14 +108,24 @@ def calculate_performance_metrics(results: pd.DataFrame) -> dict:
     max_return = valid_results['Return (%)'].max()
     min_return = valid_results['Return (%)'].min()
     
+    # Bootstrap confidence intervals for the headline figures, on returns in exit order
+    intervals = bootstrap_metrics(exit_ordered(valid_results)['Return (%)'])
+    max_drawdown = intervals["Maximum Drawdown (%)"][0] if intervals else 0.0
+
     metrics = {
         "Total Trades": total_trades,
         "Winning Trades": winning_trades,
         "Losing Trades": losing_trades,
         "Average Return (%)": average_return,
         "Maximum Return (%)": max_return,
-        "Minimum Return (%)": min_return
+        "Minimum Return (%)": min_return,
+        "Maximum Drawdown (%)": max_drawdown
     }
+
+    for name, (_, low, high) in intervals.items():
+        label = name.replace(" (%)", "")
+        metrics[f"{label} 95% CI Low (%)"] = low
+        metrics[f"{label} 95% CI High (%)"] = high
     
     # Print metrics to the console
     print("\nPerformance Metrics:")
@@ -147,8 +140,6 @@ def home():
 
 @app.route('/generate-report', methods=['POST'])
 def generate_report():
-    global output_csv
-
     try:
         # Get form inputs
         ticker = request.form['ticker']
@@ -158,36 +149,51 @@ def generate_report():
         price_change = float(request.form['price_change'])
         holding_period = int(request.form['holding_period'])
         waiting_period = int(request.form['waiting_period'])
+        if holding_period < 0 or waiting_period < 0:
+            return "<h2>Error: Holding and waiting periods must not be negative.</h2>", 400
 
         # Fetch data
         data = fetch_data(ticker, start_date, end_date)
         if data.empty:
             return "<h2>Error: No data found for the given ticker and date range.</h2>"
 
-        # Identify breakout days
-        breakout_days = identify_breakouts(data, volume_threshold, price_change)
-        if breakout_days.empty:
-            return "<h2>No breakouts identified with the given parameters. Please adjust the thresholds.</h2>"
+        # Identical parameters on unchanged data reuse the trades and metrics computed before
+        cache = get_result_cache()
+        key = normalize_params(app='basic', ticker=ticker, start_date=start_date, end_date=end_date,
+                               volume_threshold=volume_threshold, price_change=price_change,
+                               holding_period=holding_period, waiting_period=waiting_period)
+        version = data_version(data)
+        cached = cache.get(key, version)
+        if cached is not None:
+            results_breakout, metrics = cached
+        else:
+            # Identify breakout days
+            breakout_days = identify_breakouts(data, volume_threshold, price_change)
+            if breakout_days.empty:
+                return "<h2>No breakouts identified with the given parameters. Please adjust the thresholds.</h2>"
 
-        # Calculate returns
-        results_breakout = calculate_returns(data, breakout_days, holding_period, waiting_period, "Breakout Strategy")
-        if results_breakout.empty:
-            return "<h2>No valid trades found with the given holding and waiting period. Please adjust the periods.</h2>"
+            # Calculate returns
+            results_breakout = calculate_returns(data, breakout_days, holding_period, waiting_period, "Breakout Strategy")
+            if results_breakout.empty:
+                return "<h2>No valid trades found with the given holding and waiting period. Please adjust the periods.</h2>"
 
-        # Calculate and print performance metrics
-        metrics = calculate_performance_metrics(results_breakout)
+            # Calculate and print performance metrics
+            metrics = calculate_performance_metrics(results_breakout)
+            cache.put(key, version, (results_breakout, metrics))
 
         # Save results to CSV
-        output_csv = BytesIO()
-        results_breakout.to_csv(output_csv, index=False, float_format="%.2f")
-        output_csv.seek(0)
+        report_id = get_report_store().new_id()
+        get_report_store().put(report_id, 'csv', results_breakout.to_csv(index=False, float_format="%.2f").encode())
 
         # Create plot
-        plot_path = create_plot(data, results_breakout, ticker, "Breakout Strategy")
+        plot_path = create_plot(data, results_breakout, ticker, "Breakout Strategy",
+                                dict(start_date=start_date, end_date=end_date, volume_threshold=volume_threshold,
+                                     price_change=price_change, holding_period=holding_period,
+                                     waiting_period=waiting_period))
 
         return render_template('report2.html',
                                ticker=ticker,
-                               download_link=url_for('download_csv'),
+                               download_link=url_for('download_csv', report_id=report_id),
                                breakout_plot=plot_path,
                                metrics=metrics)
 
@@ -195,15 +201,42 @@ def generate_report():
         error_message = f"<h2>Internal Server Error: {str(e)}</h2><pre>{traceback.format_exc()}</pre>"
         return error_message
 
-@app.route('/download-csv')
-def download_csv():
-    global output_csv
+@app.route('/scan', methods=['GET', 'POST'])
+def scan():
+    if request.method == 'GET':
+        return render_template('scan.html', results=None, max_tickers=SCAN_MAX_TICKERS)
+
+    try:
+        tickers = parse_tickers(request.form['tickers'])
+        volume_threshold = float(request.form['volume_threshold'])
+        price_change = float(request.form['price_change'])
+        if len(set(tickers)) > SCAN_MAX_TICKERS:
+            return (f"<h2>Error: At most {SCAN_MAX_TICKERS} tickers can be scanned here. "
+                    f"Run scanner.py for larger universes.</h2>"), 400
+
+        results = scan_universe(tickers, volume_threshold, price_change)
+
+        return render_template('scan.html',
+                               results=results,
+                               scanned=len(tickers),
+                               tickers=request.form['tickers'],
+                               volume_threshold=volume_threshold,
+                               price_change=price_change,
+                               max_tickers=SCAN_MAX_TICKERS)
+
+    except Exception as e:
+        error_message = f"<h2>Internal Server Error: {str(e)}</h2><pre>{traceback.format_exc()}</pre>"
+        return error_message
+
+@app.route('/download-csv/<report_id>')
+def download_csv(report_id):
     try:
-        if output_csv:
-            output_csv.seek(0)
-            return send_file(output_csv, download_name="breakout_strategy_report.csv", as_attachment=True)
+        csv = get_report_store().get(report_id, 'csv')
+        if csv is not None:
+            return send_file(BytesIO(csv), mimetype='text/csv', download_name="breakout_strategy_report.csv",
+                             as_attachment=True)
         else:
-            return "<h2>Error: No CSV file found. Please generate the report first.</h2>"
+            return "<h2>Error: Report not found or expired. Please generate the report again.</h2>", 404
     except Exception as e:
         return f"<h2>Error during download: {str(e)}</h2>"
 
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Generated plots and files; under static/ so Flask serves them as they are
+ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', 'static/artifacts')
+
+# Disk budget and time-to-live (since last use) of artifacts
+ARTIFACT_BYTES = int(os.environ.get('ARTIFACT_BYTES', str(512 * 1024 * 1024)))
+ARTIFACT_TTL = float(os.environ.get('ARTIFACT_TTL', str(7 * 24 * 3600)))
+
+# Temporary files of renders this old were left by a crashed process and are deleted by sweeps
+_TEMP_MAX_AGE = 3600
+
+# Seconds between janitor sweeps
+ARTIFACT_SWEEP_INTERVAL = float(os.environ.get('ARTIFACT_SWEEP_INTERVAL', '300'))
+
+
+def artifact_key(**inputs) -> str:
+    """Hash of everything an artifact is generated from (ticker, dates, thresholds, data version, ...)."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ArtifactStore:
+    """Generated files named by a hash of their inputs, so identical requests reuse them.
+
+    Using an artifact refreshes its modification time. A janitor thread
+    deletes artifacts unused for ``ttl`` seconds, then the least recently used
+    ones until the directory fits in ``max_bytes``. Several processes may
+    share one directory.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DIR, max_bytes: int = ARTIFACT_BYTES, ttl: float = ARTIFACT_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._janitor = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str, key: str, suffix: str) -> str:
+        """Artifact path: a readable ``name`` followed by the input hash."""
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).lower()
+        return os.path.join(self.directory, f'{name}-{key[:20]}{suffix}')
+
+    def get_or_create(self, name: str, inputs: dict, suffix: str, render) -> str:
+        """Return the path of the artifact for ``inputs``, calling ``render(path)`` only if it does not exist yet."""
+        path = self.path(name, artifact_key(**inputs), suffix)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+        # Render under a temporary name with the same suffix, so writers can infer the format
+        temp_path = os.path.join(self.directory, f'.{os.getpid()}-{threading.get_ident()}{suffix}')
+        try:
+            render(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            # Never leave a partial render behind
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return path
+
+    def sweep(self) -> None:
+        """Delete expired artifacts, then least recently used ones beyond the byte budget.
+
+        Temporary render files are left alone unless they are older than any
+        render could take, i.e. orphaned by a process that died mid-render.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if name.startswith('.'):
+                    if now - stat.st_mtime > _TEMP_MAX_AGE:
+                        os.remove(path)
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def start_janitor(self, interval: float = ARTIFACT_SWEEP_INTERVAL) -> None:
+        """Sweep every ``interval`` seconds in a daemon thread."""
+        if self._janitor is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.sweep()
+                except OSError as e:
+                    print(f"Artifact sweep failed: {e}")
+                time.sleep(interval)
+
+        self._janitor = threading.Thread(target=run, name='artifact-janitor', daemon=True)
+        self._janitor.start()
+
+
+_default_store = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide artifact store, with its janitor running."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ArtifactStore()
+        _default_store.start_janitor()
+    return _default_store
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+# Cap on resampled values held in memory at once (resamples x trades)
+BOOTSTRAP_CHUNK_VALUES = 4_000_000
+
+
+def _sample_metrics(samples: np.ndarray) -> tuple:
+    """Win rate, average return and max drawdown of every row of resampled returns."""
+    win_rate = (samples > 0).mean(axis=1) * 100
+    average = samples.mean(axis=1)
+    # Drawdown of the cumulative return path from its running peak, which starts at 0 before the
+    # first trade, as in metrics.strategy_metrics
+    path = samples.cumsum(axis=1)
+    drawdown = (np.maximum(np.maximum.accumulate(path, axis=1), 0) - path).max(axis=1)
+    return win_rate, average, drawdown
+
+
+def bootstrap_metrics(returns, n_resamples: int = 10000, confidence: float = 0.95, resample: bool = True,
+                      seed: int = 42) -> dict:
+    """Confidence intervals for win rate, average return and maximum drawdown.
+
+    Draws all ``n_resamples`` resamples of the ``Return (%)`` series in a few
+    batched NumPy draws. With ``resample`` the trades are drawn with
+    replacement (which also randomises their order); without it only the
+    order is shuffled, which leaves win rate and average unchanged but gives
+    the spread of drawdowns over trade sequences.
+
+    ``returns`` should be in exit order (see metrics.exit_ordered) so the
+    point drawdown matches strategy_metrics.
+
+    Returns {metric: (point estimate, lower bound, upper bound)}, or {} when
+    there are no trades.
+    """
+    values = pd.Series(returns, dtype=float).dropna().to_numpy()
+    if len(values) == 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_CHUNK_VALUES // len(values))
+    metrics = []
+    for start in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - start)
+        if resample:
+            samples = values[rng.integers(0, len(values), size=(size, len(values)))]
+        else:
+            samples = rng.permuted(np.broadcast_to(values, (size, len(values))), axis=1)
+        metrics.append(_sample_metrics(samples))
+    win_rate, average, drawdown = (np.concatenate(parts) for parts in zip(*metrics))
+
+    point_win_rate, point_average, point_drawdown = (m[0] for m in _sample_metrics(values[None, :]))
+    tail = (1 - confidence) / 2 * 100
+
+    def bounds(samples):
+        return tuple(np.percentile(samples, [tail, 100 - tail]))
+
+    return {
+        "Win Rate (%)": (point_win_rate, *bounds(win_rate)),
+        "Average Return (%)": (point_average, *bounds(average)),
+        "Maximum Drawdown (%)": (point_drawdown, *bounds(drawdown)),
+    }
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+# Directory holding one Parquet file (plus a coverage sidecar) per ticker
+CACHE_DIR = os.environ.get('OHLCV_CACHE_DIR', 'cache/ohlcv')
+
+# An empty download spanning more days than this is treated as a failed fetch,
+# not as a gap with no trading days (weekends plus a holiday never exceed it).
+MAX_EMPTY_GAP_DAYS = 5
+
+
+class OHLCVCache:
+    """On-disk Parquet cache of daily bars keyed by ticker, wrapping a provider.
+
+    The cache exposes the same ``history`` method as the provider it wraps
+    (see providers.py). Each ticker keeps the bars it has downloaded together
+    with the date range those downloads covered. A request inside the covered
+    range is served from disk; a request that sticks out on either side only
+    downloads the missing head and/or tail and merges it into the stored file.
+    """
+
+    def __init__(self, provider, cache_dir: str = CACHE_DIR):
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _paths(self, ticker: str) -> tuple:
+        base = os.path.join(self.cache_dir, ticker.upper())
+        return f'{base}.parquet', f'{base}.json'
+
+    def _load(self, ticker: str) -> tuple:
+        data_path, meta_path = self._paths(ticker)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path) as f:
+                coverage = json.load(f)
+            return pd.read_parquet(data_path), coverage
+        except Exception as e:
+            print(f"Ignoring unreadable cache entry for {ticker}: {e}")
+            return None, None
+
+    def _store(self, ticker: str, data: pd.DataFrame, coverage: dict) -> None:
+        # Write to temp files and rename so concurrent readers (other gunicorn
+        # workers included) never observe a half-written entry.
+        data_path, meta_path = self._paths(ticker)
+        pid = os.getpid()
+        data.to_parquet(f'{data_path}.{pid}.tmp')
+        with open(f'{meta_path}.{pid}.tmp', 'w') as f:
+            json.dump(coverage, f)
+        os.replace(f'{data_path}.{pid}.tmp', data_path)
+        os.replace(f'{meta_path}.{pid}.tmp', meta_path)
+
+    def _download(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp):
+        """Download one missing segment; returns None if the fetch looks failed."""
+        segment = self.provider.history(ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        if segment.empty and (end - start).days > MAX_EMPTY_GAP_DAYS:
+            return None
+        print(f"Downloaded {len(segment)} bars for {ticker} from {start.date()} to {end.date()}")
+        return segment
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Return bars for [start_date, end_date), downloading only what is missing."""
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        # Today's bar may still change, so coverage never extends past it.
+        covered_end = min(end, pd.Timestamp(date.today()))
+
+        with self._lock(ticker):
+            data, coverage = self._load(ticker)
+
+            if data is None:
+                data = self.provider.history(ticker, start_date, end_date)
+                if data.empty:
+                    return data
+                self._store(ticker, data, {'start': str(start.date()), 'end': str(covered_end.date())})
+                return data
+
+            cached_start = pd.Timestamp(coverage['start'])
+            cached_end = pd.Timestamp(coverage['end'])
+            segments = [data]
+            new_start, new_end = cached_start, cached_end
+
+            # A disjoint request also pulls the gap so coverage stays contiguous.
+            if start < cached_start:
+                head = self._download(ticker, start, cached_start)
+                if head is not None:
+                    segments.insert(0, head)
+                    new_start = start
+            if end > cached_end:
+                tail = self._download(ticker, cached_end, end)
+                if tail is not None:
+                    segments.append(tail)
+                    new_end = max(cached_end, covered_end)
+
+            if len(segments) > 1:
+                data = pd.concat([s for s in segments if not s.empty])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                self._store(ticker, data, {'start': str(new_start.date()), 'end': str(new_end.date())})
+
+        tz = data.index.tz
+        lower = start.tz_localize(tz) if tz is not None else start
+        upper = end.tz_localize(tz) if tz is not None else end
+        return data[(data.index >= lower) & (data.index < upper)].copy()
+
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+def trading_day_exits(n_bars: int, signal_positions: np.ndarray, waiting_period: int, holding_period: int) -> tuple:
+    """Locate buy and sell bars for a batch of signals by position in the trading index.
+
+    A trade signalled on bar ``p`` buys on bar ``p + waiting_period`` and sells
+    on bar ``p + waiting_period + holding_period``. Trades whose buy is on or
+    after the last bar, or whose sale falls past the end of the data, are
+    dropped. Returns (signal, buy, sell) position arrays of the kept trades.
+    """
+    signal_positions = np.asarray(signal_positions, dtype=int)
+    buy_positions = signal_positions + waiting_period
+    sell_positions = buy_positions + holding_period
+    keep = (buy_positions < n_bars - 1) & (sell_positions <= n_bars - 1)
+    return signal_positions[keep], buy_positions[keep], sell_positions[keep]
+
+
+def trades_frame(data: pd.DataFrame, signal_positions: np.ndarray, buy_positions: np.ndarray,
+                 sell_positions: np.ndarray, strategy_name: str) -> pd.DataFrame:
+    """Gather prices for positional trades into the calculate_returns result columns."""
+    close = data['Close'].to_numpy()
+    buy_price = close[buy_positions]
+    sell_price = close[sell_positions]
+    return pd.DataFrame({
+        'Strategy': strategy_name,
+        'Breakout Date': data.index[signal_positions].date,
+        'Buy Date': data.index[buy_positions].date,
+        'Buy Price': buy_price,
+        'Sell Date': data.index[sell_positions].date,
+        'Sell Price': sell_price,
+        'Return (%)': (sell_price - buy_price) / buy_price * 100,
+    })
+
+
+def first_hit_exits(close: np.ndarray, entry_positions: np.ndarray, holding_period: int,
+                    stop_loss=None, take_profit=None, trailing_stop=None) -> tuple:
+    """Find the exit bar of each trade: the first stop/target/trailing hit, else the end of the hold.
+
+    Builds a (trades, holding_period + 1) window of closes starting at each
+    entry bar and evaluates every trade at once. Levels are percentages and
+    may be scalars or per-trade arrays; ``None`` disables a rule.
+    ``trailing_stop`` is measured from the highest close since entry.
+
+    Returns (exit_positions, exit_reasons). A trade whose window runs past the
+    end of the data without a hit has exit position -1 and reason ''.
+    """
+    close = np.asarray(close, dtype=float)
+    entry_positions = np.asarray(entry_positions, dtype=int)
+    if holding_period <= 0:
+        # Nothing is held, so every trade exits on its entry bar
+        return entry_positions.copy(), np.full(len(entry_positions), 'holding_period', dtype=object)
+    padded = np.concatenate([close, np.full(holding_period, np.nan)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, holding_period + 1)[entry_positions]
+
+    # Percent path return of every holding bar relative to the entry close
+    path = (windows[:, 1:] / windows[:, :1] - 1) * 100
+    hits = {}
+    with np.errstate(invalid='ignore'):
+        if stop_loss is not None:
+            hits['stop_loss'] = path <= -np.asarray(stop_loss, dtype=float).reshape(-1, 1)
+        if take_profit is not None:
+            hits['take_profit'] = path >= np.asarray(take_profit, dtype=float).reshape(-1, 1)
+        if trailing_stop is not None:
+            peak = np.fmax.accumulate(windows, axis=1)[:, 1:]
+            drawdown = (windows[:, 1:] / peak - 1) * 100
+            hits['trailing_stop'] = drawdown <= -np.asarray(trailing_stop, dtype=float).reshape(-1, 1)
+
+    # Holding-bar offset of the first hit per rule, holding_period + 1 when never hit
+    never = holding_period + 1
+    first = {rule: np.where(hit.any(axis=1), hit.argmax(axis=1) + 1, never) for rule, hit in hits.items()}
+
+    offsets = np.full(len(entry_positions), never)
+    reasons = np.full(len(entry_positions), '', dtype=object)
+    for rule, offset in first.items():
+        # Strict comparison: ties on the same bar keep the rule checked first
+        earlier = offset < offsets
+        offsets = np.where(earlier, offset, offsets)
+        reasons = np.where(earlier, rule, reasons)
+    reasons = np.where(offsets == never, 'holding_period', reasons)
+    offsets = np.minimum(offsets, holding_period)
+
+    exit_positions = entry_positions + offsets
+    missing = (exit_positions >= len(close))
+    exit_positions = np.where(missing, -1, exit_positions)
+    reasons = np.where(missing, '', reasons)
+    return exit_positions, reasons
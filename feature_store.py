@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# In-memory budget for cached indicator columns
+FEATURE_CACHE_BYTES = int(os.environ.get('FEATURE_CACHE_BYTES', str(256 * 1024 * 1024)))
+
+# Evicted columns are written here when set, and read back on a later miss
+FEATURE_SPILL_DIR = os.environ.get('FEATURE_SPILL_DIR')
+
+
+def calculate_rsi(series, period):
+    delta = series.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_macd(series, short_period=12, long_period=26, signal_period=9):
+    short_ema = series.ewm(span=short_period, min_periods=1).mean()
+    long_ema = series.ewm(span=long_period, min_periods=1).mean()
+    macd = short_ema - long_ema
+    signal = macd.ewm(span=signal_period, min_periods=1).mean()
+    return macd, signal
+
+
+def _rolling_mean(data, column, window):
+    return data[column].rolling(window=window).mean()
+
+
+def _price_change(data):
+    return data['Close'].pct_change() * 100
+
+
+def _rsi(data, period):
+    return calculate_rsi(data['Close'], period)
+
+
+def _macd(data, short_period, long_period, signal_period):
+    return calculate_macd(data['Close'], short_period, long_period, signal_period)
+
+
+MACD_PARAMS = {'short_period': 12, 'long_period': 26, 'signal_period': 9}
+
+# Column name -> (function, parameters, columns the function returns). MACD and
+# its signal line come from one call and are cached together.
+INDICATORS = {
+    '20DayAvgVolume': (_rolling_mean, {'column': 'Volume', 'window': 20}, ('20DayAvgVolume',)),
+    '10DaySMA': (_rolling_mean, {'column': 'Close', 'window': 10}, ('10DaySMA',)),
+    '50DaySMA': (_rolling_mean, {'column': 'Close', 'window': 50}, ('50DaySMA',)),
+    'PriceChange': (_price_change, {}, ('PriceChange',)),
+    'RSI': (_rsi, {'period': 14}, ('RSI',)),
+    'MACD': (_macd, MACD_PARAMS, ('MACD', 'MACD_Signal')),
+    'MACD_Signal': (_macd, MACD_PARAMS, ('MACD', 'MACD_Signal')),
+}
+
+
+def data_version(data: pd.DataFrame) -> str:
+    """Cheap fingerprint of a price history: its span, length and column totals."""
+    if data.empty:
+        return 'empty'
+    summary = (len(data), str(data.index[0]), str(data.index[-1]),
+               float(data['Close'].sum()), float(data['Volume'].sum()))
+    return hashlib.sha1(repr(summary).encode()).hexdigest()[:16]
+
+
+class FeatureStore:
+    """Indicator columns computed once per (ticker, data version, parameters).
+
+    Columns are requested by name (see INDICATORS) and kept in an in-memory
+    LRU bounded by ``max_bytes``. When ``spill_dir`` is set, evicted columns
+    are written there as Parquet and reloaded on a later miss instead of being
+    recomputed.
+    """
+
+    def __init__(self, max_bytes: int = FEATURE_CACHE_BYTES, spill_dir: str = FEATURE_SPILL_DIR):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(ticker: str, version: str, name: str) -> tuple:
+        function, params, _ = INDICATORS[name]
+        return ticker.upper(), version, function.__name__, tuple(sorted(params.items()))
+
+    def _spill_path(self, key: tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.spill_dir, f'{digest}.parquet')
+
+    def _lookup(self, key: tuple):
+        with self._lock:
+            columns = self._entries.get(key)
+            if columns is not None:
+                self._entries.move_to_end(key)
+                return columns
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            columns = pd.read_parquet(self._spill_path(key))
+            self._insert(key, columns)
+            return columns
+        return None
+
+    def _insert(self, key: tuple, columns: pd.DataFrame) -> None:
+        size = int(columns.memory_usage(deep=True).sum())
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = columns
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_columns = self._entries.popitem(last=False)
+                self._bytes -= int(old_columns.memory_usage(deep=True).sum())
+                evicted.append((old_key, old_columns))
+        if self.spill_dir:
+            for old_key, old_columns in evicted:
+                path = self._spill_path(old_key)
+                if not os.path.exists(path):
+                    old_columns.to_parquet(path)
+
+    def features(self, ticker: str, data: pd.DataFrame, names: list, version: str = None) -> pd.DataFrame:
+        """Return the requested indicator columns for ``data``, aligned on its index."""
+        version = version or data_version(data)
+        result = {}
+        for name in names:
+            key = self._key(ticker, version, name)
+            columns = self._lookup(key)
+            if columns is None:
+                self.misses += 1
+                function, params, outputs = INDICATORS[name]
+                values = function(data, **params)
+                if len(outputs) == 1:
+                    values = (values,)
+                columns = pd.DataFrame(dict(zip(outputs, values)), index=data.index)
+                self._insert(key, columns)
+            else:
+                self.hits += 1
+            result[name] = columns[name]
+        return pd.DataFrame(result, index=data.index)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_default_store = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Return the process-wide feature store."""
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore()
+    return _default_store
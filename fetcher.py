@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+# Size of the thread pool shared by all fetches in a process
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', '8'))
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` calls per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConcurrentFetcher:
+    """Fetch bars for many tickers on a bounded thread pool.
+
+    Identical requests that are in flight at the same time are coalesced: the
+    first caller triggers the download and every other caller for the same
+    (ticker, start_date, end_date) waits on that same future. Each caller gets
+    its own copy of the result since the analysis code adds columns in place.
+    Coalescing is per process; under gunicorn every worker has its own fetcher.
+    """
+
+    def __init__(self, provider, max_workers: int = FETCH_WORKERS):
+        self.provider = provider
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def _fetch(self, key: tuple, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        try:
+            return self.provider.history(ticker, start_date, end_date)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, ticker: str, start_date: str, end_date: str) -> Future:
+        """Start (or join) the download for one ticker and return its future."""
+        key = (ticker.upper(), start_date, end_date)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._executor.submit(self._fetch, key, ticker, start_date, end_date)
+            self._inflight[key] = future
+        return future
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Provider-compatible single fetch."""
+        return self.submit(ticker, start_date, end_date).result().copy()
+
+    def fetch_many(self, tickers: list, start_date: str, end_date: str) -> dict:
+        """Fetch all tickers in parallel; returns {ticker: DataFrame}, empty on failure."""
+        futures = {ticker: self.submit(ticker, start_date, end_date) for ticker in tickers}
+        results = {}
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result().copy()
+            except Exception as e:
+                print(f"Error fetching data for {ticker}: {e}")
+                results[ticker] = pd.DataFrame()
+        return results
@@ -0,0 +1,187 @@
+import argparse
+import os
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Cap on (rows x trees) node indices traversed at once; small enough to stay in cache
+INFERENCE_CHUNK_NODES = 250_000
+
+# Batches up to this size use the compiled arrays; larger ones amortise sklearn's
+# per-call overhead and run faster there (see `python forest_inference.py`)
+COMPILED_MAX_ROWS = int(os.environ.get('COMPILED_MAX_ROWS', '256'))
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into NumPy node arrays.
+
+    All trees share one set of arrays; ``roots`` holds the first node of each
+    tree and ``children`` the (left, right) pair of every node. Leaves point to
+    themselves, so every row can step down all trees together for ``depth``
+    iterations. ``value`` holds the class probabilities of each leaf, and the
+    forest's probability is their mean over the trees, summed in tree order as
+    sklearn does, so predictions are identical.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.classes_ = classes
+
+    @classmethod
+    def from_model(cls, model) -> 'CompiledForest':
+        """Flatten the trees of a fitted forest classifier."""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.stack([np.where(is_leaf, nodes, tree.children_left),
+                                      np.where(is_leaf, nodes, tree.children_right)], axis=1) + offset)
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        return cls(np.concatenate(features).astype(np.int32), np.concatenate(thresholds),
+                   np.concatenate(children).ravel().astype(np.int32), np.concatenate(values),
+                   np.array(roots, dtype=np.int32), depth, np.asarray(model.classes_))
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index reached in every tree, shaped (trees, rows)."""
+        flat = X.ravel()
+        row_start = (np.arange(len(X)) * X.shape[1])[None, :]
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.depth):
+            go_right = flat[row_start + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, one row per sample."""
+        # Trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        chunk = max(1, INFERENCE_CHUNK_NODES // len(self.roots))
+        proba = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk):
+            leaves = self._leaves(X[start:start + chunk])
+            proba[start:start + chunk] = self.value[leaves].sum(axis=0) / len(self.roots)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str) -> None:
+        np.savez(path, feature=self.feature, threshold=self.threshold, children=self.children, value=self.value,
+                 roots=self.roots, depth=self.depth, classes=self.classes_)
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledForest':
+        arrays = np.load(path, allow_pickle=False)
+        return cls(arrays['feature'], arrays['threshold'], arrays['children'], arrays['value'], arrays['roots'],
+                   int(arrays['depth']), arrays['classes'])
+
+
+_compiled = weakref.WeakKeyDictionary()
+
+
+def compiled_forest(model) -> CompiledForest:
+    """Return the compiled form of a fitted forest, flattening it once per model object."""
+    forest = _compiled.get(model)
+    if forest is None:
+        forest = _compiled[model] = CompiledForest.from_model(model)
+    return forest
+
+
+def forest_predict_proba(model, X) -> np.ndarray:
+    """predict_proba of a fitted forest, through the compiled arrays for small batches.
+
+    ``X`` goes to sklearn as given, so pass a DataFrame when the model was
+    fitted on one (sklearn checks its feature names).
+    """
+    if len(X) <= COMPILED_MAX_ROWS:
+        return compiled_forest(model).predict_proba(X)
+    return model.predict_proba(X)
+
+
+def forest_predict(model, X) -> np.ndarray:
+    """predict of a fitted forest; identical to model.predict for any batch size."""
+    return model.classes_[np.argmax(forest_predict_proba(model, X), axis=1)]
+
+
+def benchmark(model, X: np.ndarray, sizes=(1, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+              max_seconds: float = 2.0) -> pd.DataFrame:
+    """Latency and throughput of sklearn and compiled predict for each batch size.
+
+    Batches are drawn from the rows of ``X`` (repeated as needed). Each
+    measurement repeats the call until ``max_seconds`` have passed and keeps
+    the fastest run; predictions are checked to be identical.
+    """
+    forest = compiled_forest(model)
+    rng = np.random.default_rng(0)
+    rows = []
+    for size in sizes:
+        batch = X[rng.integers(0, len(X), size=size)]
+        timings = {}
+        for name, predict in (('sklearn', model.predict), ('compiled', forest.predict)):
+            best = np.inf
+            deadline = time.perf_counter() + max_seconds
+            while True:
+                start = time.perf_counter()
+                predictions = predict(batch)
+                best = min(best, time.perf_counter() - start)
+                if time.perf_counter() > deadline:
+                    break
+            timings[name] = (best, predictions)
+        if not np.array_equal(timings['sklearn'][1], timings['compiled'][1]):
+            raise AssertionError(f"Compiled predictions differ from sklearn for batch size {size}")
+        rows.append({
+            'Batch Size': size,
+            'sklearn Latency (ms)': timings['sklearn'][0] * 1000,
+            'Compiled Latency (ms)': timings['compiled'][0] * 1000,
+            'sklearn Rows/s': size / timings['sklearn'][0],
+            'Compiled Rows/s': size / timings['compiled'][0],
+            'Speedup': timings['sklearn'][0] / timings['compiled'][0],
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    from sklearn.ensemble import RandomForestClassifier
+
+    from app_advanced import ML_FEATURES, ML_PARAMS
+    from model_evaluation import _training_frame
+    from providers import get_provider
+
+    parser = argparse.ArgumentParser(description="Benchmark compiled forest inference against sklearn.")
+    parser.add_argument('ticker')
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--volume-threshold', type=float, default=150)
+    parser.add_argument('--price-change', type=float, default=2)
+    parser.add_argument('--max-batch', type=int, default=1_000_000)
+    parser.add_argument('--seconds', type=float, default=2.0, help="Time spent per measurement")
+    args = parser.parse_args()
+
+    data = get_provider().history(args.ticker, args.start_date, args.end_date)
+    frame = _training_frame(args.ticker, data, args.volume_threshold, args.price_change)
+    X = frame[ML_FEATURES].to_numpy()
+    y = (frame['VolumeBreakout'] & frame['PriceBreakout']).astype(int)
+    model = RandomForestClassifier(**ML_PARAMS).fit(X, y)
+
+    sizes = [10 ** p for p in range(7) if 10 ** p <= args.max_batch]
+    print(benchmark(model, X, sizes, args.seconds).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == '__main__':
+    main()
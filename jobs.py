@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# SQLite file holding the queue; shared by all workers on this host
+JOB_DB = os.environ.get('JOB_DB', 'cache/jobs.sqlite3')
+
+# Background threads running jobs in each process
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+
+# A running job without progress for this long is assumed lost with its process and requeued
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '600'))
+
+# Finished jobs are deleted after this long
+JOB_RETENTION_SECONDS = float(os.environ.get('JOB_RETENTION_SECONDS', str(24 * 3600)))
+
+# Seconds an idle worker waits before checking for jobs queued by other processes
+_POLL_INTERVAL = 1.0
+
+
+class JobQueue:
+    """A local job queue in SQLite, worked by a thread pool in every process that starts it.
+
+    Job functions are registered by kind and called as ``function(params,
+    progress)``, where ``progress(stage)`` records the stage being run. Their
+    return value must be JSON-serialisable and is kept as the job's result.
+    Since the queue lives in SQLite, a job submitted by one worker process
+    can be run, and its status read, by any other.
+    """
+
+    def __init__(self, path: str = JOB_DB, workers: int = JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._functions = {}
+        self._threads = []
+        self._wake = threading.Condition()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                       'id TEXT PRIMARY KEY, kind TEXT, params TEXT, status TEXT, stage TEXT, '
+                       'completed INTEGER, total INTEGER, result TEXT, error TEXT, created REAL, updated REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)')
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    def register(self, kind: str, function, stages: list) -> None:
+        """Make ``kind`` runnable; ``stages`` names the stages its progress goes through, in order."""
+        self._functions[kind] = (function, list(stages))
+
+    def submit(self, kind: str, params: dict) -> str:
+        """Queue a job and return its ID."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        total = len(self._functions[kind][1])
+        self._connection().execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   (job_id, kind, json.dumps(params), 'queued', None, 0, total, None, None, now, now))
+        with self._wake:
+            self._wake.notify()
+        return job_id
+
+    def status(self, job_id: str) -> dict:
+        """Status, current stage and progress of a job, or None when it is unknown."""
+        row = self._connection().execute('SELECT kind, status, stage, completed, total, result, error '
+                                         'FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        kind, status, stage, completed, total, result, error = row
+        stages = self._functions.get(kind, (None, []))[1]
+        return {
+            'id': job_id,
+            'status': status,
+            'stage': stage,
+            'stages': stages,
+            'completed': completed,
+            'total': total,
+            'result': json.loads(result) if result is not None else None,
+            'error': error,
+        }
+
+    def _claim(self):
+        """Atomically take the oldest queued (or stale running) job of a registered kind."""
+        db = self._connection()
+        now = time.time()
+        kinds = list(self._functions)
+        placeholders = ','.join('?' * len(kinds))
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(f"SELECT id, kind, params FROM jobs WHERE kind IN ({placeholders}) "
+                             f"AND (status = 'queued' OR (status = 'running' AND updated < ?)) "
+                             f"ORDER BY created LIMIT 1", (*kinds, now - JOB_STALE_SECONDS)).fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status = 'running', completed = 0, updated = ? WHERE id = ?",
+                           (now, row[0]))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return row
+
+    def _progress(self, job_id: str, stages: list):
+        def progress(stage: str) -> None:
+            completed = stages.index(stage) if stage in stages else 0
+            self._connection().execute('UPDATE jobs SET stage = ?, completed = ?, updated = ? WHERE id = ?',
+                                       (stage, completed, time.time(), job_id))
+        return progress
+
+    def _finish(self, job_id: str, status: str, result=None, error: str = None) -> None:
+        self._connection().execute("UPDATE jobs SET status = ?, completed = CASE WHEN ? = 'done' THEN total "
+                                   "ELSE completed END, result = ?, error = ?, updated = ? WHERE id = ?",
+                                   (status, status, json.dumps(result) if result is not None else None, error,
+                                    time.time(), job_id))
+
+    def _work(self) -> None:
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                with self._wake:
+                    self._wake.wait(_POLL_INTERVAL)
+                continue
+
+            job_id, kind, params = job
+            function, stages = self._functions[kind]
+            try:
+                result = function(json.loads(params), self._progress(job_id, stages))
+                self._finish(job_id, 'done', result=result)
+            except Exception as e:
+                traceback.print_exc()
+                self._finish(job_id, 'failed', error=str(e))
+
+    def prune(self) -> None:
+        """Delete finished jobs past their retention."""
+        self._connection().execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+                                   (time.time() - JOB_RETENTION_SECONDS,))
+
+    def start(self) -> None:
+        """Start the worker threads of this process (once)."""
+        if self._threads:
+            return
+        self.prune()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+_default_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = JobQueue()
+    return _default_queue
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ['Total Trades', 'Winning Trades', 'Losing Trades', 'Win Rate (%)', 'Average Return (%)',
+                  'Maximum Return (%)', 'Minimum Return (%)', 'Maximum Drawdown (%)', 'Drawdown Duration (days)',
+                  'Sharpe Ratio', 'Sortino Ratio', 'Profit Factor', 'Exposure (%)']
+
+
+def clean_trades(results: pd.DataFrame) -> pd.DataFrame:
+    """Drop section separator rows and trades without a return."""
+    separators = [name for name in results['Strategy'].unique() if str(name).startswith('---')]
+    return results[~results['Strategy'].isin(separators) & results['Return (%)'].notna()]
+
+
+def exit_ordered(trades: pd.DataFrame) -> pd.DataFrame:
+    """Trades sorted by exit date, ties kept in row order: the order drawdowns are measured in."""
+    return trades.sort_values('Sell Date', key=pd.to_datetime, kind='stable')
+
+
+def _group_cummax(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Running maximum restarting at every group of a group-sorted array."""
+    # Lift each group above all earlier ones so one global accumulate suffices
+    offset = codes * (2 * np.abs(values).max() + 1) if len(values) else 0
+    return np.maximum.accumulate(values + offset) - offset
+
+
+def strategy_metrics(results: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
+    """Per-strategy performance of a trades table, computed for all strategies in one grouped pass.
+
+    ``results`` holds calculate_returns rows for any number of strategies
+    (separator rows are ignored). Trades are sorted once by strategy and exit
+    date and every statistic is a segmented NumPy reduction:
+
+    - Maximum Drawdown (%): largest fall of the cumulative trade return, in exit
+      order, from its running peak, which starts at 0 before the first trade
+      (as bootstrap.bootstrap_metrics measures it); Drawdown Duration is the
+      longest time in calendar days spent below a previous peak.
+    - Sharpe / Sortino Ratio: mean trade return over its standard / downside
+      deviation, annualised by the number of trades per year.
+    - Profit Factor: gross gains over gross losses.
+    - Exposure (%): share of the period with at least one position open. The
+      period defaults to the span of each strategy's trades.
+
+    Returns a DataFrame indexed by Strategy with METRIC_COLUMNS, in order of
+    first appearance.
+    """
+    trades = clean_trades(results)
+    names = [name for name in results['Strategy'].unique() if not str(name).startswith('---')]
+    entry_column = 'Buy Date' if 'Buy Date' in trades else 'Breakout Date'
+    codes, strategies = pd.factorize(trades['Strategy'])
+    entry = pd.to_datetime(trades[entry_column]).to_numpy().astype('datetime64[D]').astype(np.int64)
+    exit_ = pd.to_datetime(trades['Sell Date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    returns = trades['Return (%)'].to_numpy(dtype=float)
+
+    # One stable sort by (strategy, exit date) shared by every statistic; see exit_ordered
+    span = exit_.max() - exit_.min() + 1 if len(exit_) else 1
+    order = np.argsort(codes * span + (exit_ - (exit_.min() if len(exit_) else 0)), kind='stable')
+    codes, entry, exit_, returns = codes[order], entry[order], exit_[order], returns[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+    counts = np.diff(np.r_[starts, len(codes)])
+    group = codes[starts]
+
+    def group_sum(values):
+        return np.add.reduceat(values, starts) if len(starts) else np.array([])
+
+    total = counts.astype(float)
+    wins = group_sum((returns > 0).astype(float))
+    losses = group_sum((returns < 0).astype(float))
+    mean = group_sum(returns) / total
+    deviation = returns - np.repeat(mean, counts)
+    std = np.sqrt(group_sum(deviation ** 2) / np.maximum(total - 1, 1))
+    std[total < 2] = np.nan
+    downside = np.sqrt(group_sum(np.minimum(returns, 0) ** 2) / total)
+    gross_gain = group_sum(np.maximum(returns, 0))
+    gross_loss = group_sum(-np.minimum(returns, 0))
+
+    # Cumulative return path per strategy, with the running peak floored at the 0 start
+    equity = np.cumsum(returns)
+    equity -= np.repeat(equity[starts] - returns[starts], counts)
+    peak = np.maximum(_group_cummax(equity, codes), 0)
+    drawdown = peak - equity
+    at_peak = drawdown <= 0
+    is_start = np.zeros(len(codes), dtype=bool)
+    is_start[starts] = True
+    first_entry = np.minimum.reduceat(entry, starts) if len(starts) else entry
+    # Date of the latest peak: the exit of the last trade at a peak, else the first entry
+    candidate = np.where(at_peak, exit_, np.repeat(first_entry, counts))
+    latest = np.maximum.accumulate(np.where(at_peak | is_start, np.arange(len(codes)), 0))
+    underwater = np.where(at_peak, 0, exit_ - candidate[latest])
+
+    # Time in the market: union of holding intervals, in entry order
+    by_entry = np.argsort(codes * (entry.max() - entry.min() + 1) + (entry - entry.min())) if len(entry) else order[:0]
+    entry_sorted, exit_sorted = entry[by_entry], exit_[by_entry]
+    covered_until = _group_cummax(exit_sorted.astype(float), codes).astype(np.int64)
+    previous_end = np.r_[np.iinfo(np.int64).min, covered_until[:-1]]
+    previous_end[starts] = np.iinfo(np.int64).min
+    held = np.clip(exit_sorted - np.maximum(entry_sorted, previous_end), 0, None)
+
+    if period_start is not None and period_end is not None:
+        span_days = np.full(len(starts), (pd.Timestamp(period_end) - pd.Timestamp(period_start)).days)
+    else:
+        span_days = (np.maximum.reduceat(exit_, starts) if len(starts) else exit_) - first_entry
+    span_days = np.maximum(span_days, 1)
+    trades_per_year = total / (span_days / 365.25)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary = pd.DataFrame({
+            'Total Trades': counts,
+            'Winning Trades': wins.astype(int),
+            'Losing Trades': losses.astype(int),
+            'Win Rate (%)': wins / total * 100,
+            'Average Return (%)': mean,
+            'Maximum Return (%)': np.maximum.reduceat(returns, starts) if len(starts) else [],
+            'Minimum Return (%)': np.minimum.reduceat(returns, starts) if len(starts) else [],
+            'Maximum Drawdown (%)': np.maximum.reduceat(drawdown, starts) if len(starts) else [],
+            'Drawdown Duration (days)': np.maximum.reduceat(underwater, starts) if len(starts) else [],
+            'Sharpe Ratio': mean / std * np.sqrt(trades_per_year),
+            'Sortino Ratio': mean / downside * np.sqrt(trades_per_year),
+            'Profit Factor': gross_gain / gross_loss,
+            'Exposure (%)': np.minimum(group_sum(held) / span_days * 100, 100),
+        }, index=pd.Index(strategies[group], name='Strategy'), columns=METRIC_COLUMNS)
+
+    # Every strategy in the results, in order of first appearance, even without completed trades
+    summary = summary.replace([np.inf, -np.inf], np.nan).reindex(pd.Index(names, name='Strategy'))
+    counts = ['Total Trades', 'Winning Trades', 'Losing Trades']
+    summary[counts] = summary[counts].fillna(0).astype(int)
+    return summary
@@ -0,0 +1,169 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import precision_score, recall_score
+
+from metrics import strategy_metrics
+from scanner import parse_tickers
+
+# Bars dropped between each train window and its test window; covers the longest
+# indicator lookback (50-day SMA) so no training row shares inputs with a test row
+PURGE_BARS = 50
+
+FOLD_METRICS = ['Total Trades', 'Win Rate (%)', 'Average Return (%)', 'Maximum Drawdown (%)']
+
+
+def purged_folds(n_rows: int, n_splits: int = 5, min_train: int = 252, purge: int = PURGE_BARS) -> list:
+    """Expanding-window (train_end, test_start, test_end) row positions.
+
+    The rows after ``min_train`` are split into ``n_splits`` consecutive test
+    windows. Each fold trains on rows [0, train_end) and tests on
+    [test_start, test_end), with ``purge`` rows left out in between.
+    """
+    if n_rows <= min_train + purge:
+        return []
+    bounds = np.linspace(min_train + purge, n_rows, n_splits + 1).astype(int)
+    return [(int(start) - purge, int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _training_frame(ticker: str, data: pd.DataFrame, volume_threshold: float, price_change: float) -> pd.DataFrame:
+    """Indicators and breakout labels of one ticker, as generate_report builds them."""
+    from feature_store import get_feature_store
+
+    data = data.join(get_feature_store().features(ticker, data, ['20DayAvgVolume', '10DaySMA', '50DaySMA',
+                                                                  'PriceChange']))
+    data['VolumeBreakout'] = data['Volume'] > (volume_threshold / 100) * data['20DayAvgVolume']
+    data['PriceBreakout'] = data['PriceChange'] > price_change
+    return data.dropna()
+
+
+def _evaluate_fold(ticker: str, fold: int, data: pd.DataFrame, bounds: tuple, holding_period: int,
+                   params: dict) -> dict:
+    """Worker: fit on the train rows of one fold, then score and trade its test rows."""
+    from app_advanced import ML_FEATURES, calculate_returns
+
+    train_end, test_start, test_end = bounds
+    X = data[ML_FEATURES].to_numpy()
+    y = (data['VolumeBreakout'] & data['PriceBreakout']).to_numpy().astype(int)
+
+    model = RandomForestClassifier(**params)
+    model.fit(X[:train_end], y[:train_end])
+    predicted = model.predict(X[test_start:test_end])
+    actual = y[test_start:test_end]
+
+    # Exits may not look past the test window
+    window = data.iloc[:test_end]
+    signals = window.iloc[test_start:][predicted == 1]
+    trades = calculate_returns(window, signals, holding_period, "ML Predicted Breakouts")
+    performance = strategy_metrics(trades).reindex(["ML Predicted Breakouts"])
+    performance['Total Trades'] = performance['Total Trades'].fillna(0).astype(int)
+
+    return {
+        'Ticker': ticker,
+        'Fold': fold,
+        'Train End': data.index[train_end - 1].date(),
+        'Test Start': data.index[test_start].date(),
+        'Test End': data.index[test_end - 1].date(),
+        'Train Rows': train_end,
+        'Test Rows': test_end - test_start,
+        'Actual Breakouts': int(actual.sum()),
+        'Predicted Breakouts': int(predicted.sum()),
+        'Precision (%)': precision_score(actual, predicted, zero_division=0) * 100,
+        'Recall (%)': recall_score(actual, predicted, zero_division=0) * 100,
+        **{name: performance[name].iloc[0] for name in FOLD_METRICS},
+    }
+
+
+def cross_validate(tickers: list, start_date: str, end_date: str, volume_threshold: float, price_change: float,
+                   holding_period: int, n_splits: int = 5, min_train: int = 252, purge: int = PURGE_BARS,
+                   params: dict = None, max_workers: int = None) -> pd.DataFrame:
+    """Out-of-sample evaluation of the ML breakout strategy, one row per (ticker, fold).
+
+    Each fold fits the forest used by predict_breakouts_with_ml (``params``
+    default to app_advanced.ML_PARAMS) on its expanding train window only,
+    then reports precision and recall of the predicted breakouts on the test
+    window and the performance of trading them with calculate_returns. All
+    folds of all tickers run in one process pool.
+    """
+    from app_advanced import ML_PARAMS
+    from providers import get_provider
+
+    params = params or ML_PARAMS
+    prices = get_provider().fetch_many(tickers, start_date, end_date)
+
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context) as pool:
+        futures = []
+        for ticker, data in prices.items():
+            frame = _training_frame(ticker, data, volume_threshold, price_change)
+            for fold, bounds in enumerate(purged_folds(len(frame), n_splits, min_train, purge)):
+                # Each worker gets only the rows its fold may see
+                futures.append((ticker, pool.submit(_evaluate_fold, ticker, fold, frame.iloc[:bounds[2]], bounds,
+                                                    holding_period, params)))
+        for ticker, future in futures:
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                print(f"Error evaluating {ticker}: {e}")
+    return pd.DataFrame(rows)
+
+
+def summarize_cross_validation(folds: pd.DataFrame) -> pd.DataFrame:
+    """Per-ticker totals: precision and recall over all test rows, trade-weighted returns."""
+    totals = folds.assign(
+        **{'Hits': folds['Precision (%)'] / 100 * folds['Predicted Breakouts'],
+           'Return Sum': folds['Average Return (%)'].fillna(0) * folds['Total Trades']}
+    ).groupby('Ticker').agg(**{
+        'Folds': ('Fold', 'count'),
+        'Actual Breakouts': ('Actual Breakouts', 'sum'),
+        'Predicted Breakouts': ('Predicted Breakouts', 'sum'),
+        'Hits': ('Hits', 'sum'),
+        'Total Trades': ('Total Trades', 'sum'),
+        'Return Sum': ('Return Sum', 'sum'),
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totals['Precision (%)'] = totals['Hits'] / totals['Predicted Breakouts'] * 100
+        totals['Recall (%)'] = totals['Hits'] / totals['Actual Breakouts'] * 100
+        totals['Average Return (%)'] = totals['Return Sum'] / totals['Total Trades']
+    return totals.drop(columns=['Hits', 'Return Sum'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purged time-series cross-validation of the ML breakout strategy.")
+    parser.add_argument('tickers', nargs='*')
+    parser.add_argument('--file', help="File with tickers, comma- or whitespace-separated")
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--volume-threshold', type=float, required=True)
+    parser.add_argument('--price-change', type=float, required=True)
+    parser.add_argument('--holding-period', type=int, required=True)
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--min-train', type=int, default=252)
+    parser.add_argument('--purge', type=int, default=PURGE_BARS)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="Write the per-fold results to this CSV file")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers += parse_tickers(f.read())
+
+    folds = cross_validate(tickers, args.start_date, args.end_date, args.volume_threshold, args.price_change,
+                           args.holding_period, args.splits, args.min_train, args.purge, max_workers=args.workers)
+    if folds.empty:
+        print("Not enough history for any fold")
+        return
+    print(summarize_cross_validation(folds).to_string(float_format="%.2f"))
+    if args.output:
+        folds.to_csv(args.output, index=False, float_format="%.4f")
+
+
+if __name__ == '__main__':
+    main()
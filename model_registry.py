@@ -0,0 +1,254 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Directory holding one joblib file per fitted model
+MODEL_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'cache/models')
+
+# Disk budget for stored models; the least recently used are deleted beyond it
+MODEL_REGISTRY_BYTES = int(os.environ.get('MODEL_REGISTRY_BYTES', str(512 * 1024 * 1024)))
+
+# Models kept loaded in memory per process
+MODEL_MEMORY_ENTRIES = int(os.environ.get('MODEL_MEMORY_ENTRIES', '16'))
+
+# Incremental training: trees added per update, the recent bars they are fitted
+# on, and how many added trees are allowed before the forest is refitted
+INCREMENTAL_TREES = int(os.environ.get('INCREMENTAL_TREES', '10'))
+INCREMENTAL_WINDOW = int(os.environ.get('INCREMENTAL_WINDOW', '252'))
+MAX_ADDED_TREES = int(os.environ.get('MAX_ADDED_TREES', '100'))
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    """Hash of the training rows, including their dates, and labels."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _estimator_name(factory) -> str:
+    return f'{factory.__module__}.{factory.__qualname__}'
+
+
+def model_key(ticker: str, X: pd.DataFrame, y: pd.Series, factory, params: dict, incremental: bool = False) -> str:
+    """Registry key of a model: ticker, training data, feature list, estimator class and hyperparameters.
+
+    Forests extended with warm_start by get_or_update are not what
+    ``factory(**params)`` fits on the data, so they get ``incremental`` keys
+    of their own.
+    """
+    spec = {
+        'ticker': ticker.upper(),
+        'data': data_fingerprint(X, y),
+        'features': list(X.columns),
+        'estimator': _estimator_name(factory),
+        'params': params,
+        'sklearn': sklearn.__version__,
+    }
+    if incremental:
+        spec['mode'] = 'incremental'
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def lineage_key(ticker: str, X: pd.DataFrame, factory, params: dict) -> str:
+    """Key shared by all models of one ticker, feature list, estimator class, parameters and start date."""
+    spec = {
+        'ticker': ticker.upper(),
+        'start': str(X.index[0]) if len(X) else None,
+        'features': list(X.columns),
+        'estimator': _estimator_name(factory),
+        'params': params,
+        'sklearn': sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ModelRegistry:
+    """Fitted models stored on disk with joblib, keyed by model_key.
+
+    Recently used models are also kept in memory, so a repeat request skips
+    both the fit and the load. The directory is kept under ``max_bytes`` by
+    deleting the least recently used files (by modification time, which is
+    refreshed on every hit), so several processes can share it.
+    """
+
+    def __init__(self, directory: str = MODEL_DIR, max_bytes: int = MODEL_REGISTRY_BYTES,
+                 memory_entries: int = MODEL_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.joblib')
+
+    def _head_path(self, lineage: str) -> str:
+        return os.path.join(self.directory, f'{lineage}.head.json')
+
+    def _read_head(self, lineage: str) -> dict:
+        try:
+            with open(self._head_path(lineage)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_head(self, lineage: str, head: dict) -> None:
+        path = self._head_path(lineage)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(head, f)
+        os.replace(temp_path, path)
+
+    def _remember(self, key: str, model) -> None:
+        with self._lock:
+            self._memory[key] = model
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Return the stored model for ``key``, or None."""
+        with self._lock:
+            model = self._memory.get(key)
+            if model is not None:
+                self._memory.move_to_end(key)
+        path = self._path(key)
+        if model is not None:
+            if os.path.exists(path):
+                os.utime(path)
+            return model
+        try:
+            model = joblib.load(path)
+        except (FileNotFoundError, EOFError):
+            return None
+        os.utime(path)
+        self._remember(key, model)
+        return model
+
+    def put(self, key: str, model) -> None:
+        """Store ``model`` under ``key`` and enforce the disk budget."""
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(model, temp_path)
+        os.replace(temp_path, path)
+        self._remember(key, model)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used model files until the directory fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.joblib'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_or_fit(self, ticker: str, X: pd.DataFrame, y: pd.Series, factory, params: dict):
+        """Return the model for these inputs, fitting ``factory(**params)`` only if none is stored."""
+        key = model_key(ticker, X, y, factory, params)
+        model = self.get(key)
+        if model is None:
+            model = factory(**params)
+            model.fit(X, y)
+            self.put(key, model)
+            print(f"Trained and stored model {key[:12]} for {ticker}")
+        return model
+
+    def get_or_update(self, ticker: str, X: pd.DataFrame, y: pd.Series, factory, params: dict,
+                      trees: int = INCREMENTAL_TREES, window: int = INCREMENTAL_WINDOW,
+                      max_added_trees: int = MAX_ADDED_TREES):
+        """Like get_or_fit, but extend the last model of this ticker when bars were only appended.
+
+        The latest model of each lineage (ticker, features, estimator, parameters
+        and first date) is recorded with the number of rows it has seen and their
+        fingerprint. When ``X`` starts with exactly those rows, a copy of that
+        forest gets ``trees`` more trees with warm_start, fitted on the last
+        ``window`` rows only; older bars are not revisited. The forest is
+        refitted from scratch instead when:
+
+        - there is no earlier model, or it has been evicted;
+        - earlier rows or labels changed (e.g. adjusted prices, other thresholds);
+        - more than ``window`` bars were appended since the last model;
+        - the added trees would exceed ``max_added_trees`` since the last refit;
+        - the recent window does not contain the same classes as the forest.
+        """
+        # A full fit of the same data is as good as an extended one
+        for key in (model_key(ticker, X, y, factory, params, incremental=True),
+                    model_key(ticker, X, y, factory, params)):
+            model = self.get(key)
+            if model is not None:
+                return model
+
+        lineage = lineage_key(ticker, X, factory, params)
+        head = self._read_head(lineage)
+        base, reason = None, None
+        if head is None:
+            reason = "no earlier model"
+        elif len(X) <= head['rows']:
+            reason = "history changed"
+        elif len(X) - head['rows'] > window:
+            reason = f"{len(X) - head['rows']} new bars"
+        elif head['added_trees'] + trees > max_added_trees:
+            reason = "added tree budget reached"
+        elif data_fingerprint(X.iloc[:head['rows']], y.iloc[:head['rows']]) != head['fingerprint']:
+            reason = "earlier bars changed"
+        else:
+            base = self.get(head['key'])
+            if base is None:
+                reason = "earlier model evicted"
+            elif not np.array_equal(np.unique(y.iloc[-window:]), base.classes_):
+                reason = "classes changed"
+
+        if reason is None:
+            # The stored forest may be shared from memory, so extend a copy
+            model = copy.deepcopy(base)
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+            model.fit(X.iloc[-window:], y.iloc[-window:])
+            model.set_params(warm_start=False)
+            added_trees = head['added_trees'] + trees
+            key = model_key(ticker, X, y, factory, params, incremental=True)
+            print(f"Added {trees} trees for {len(X) - head['rows']} new bars of {ticker}")
+        else:
+            model = factory(**params)
+            model.fit(X, y)
+            added_trees = 0
+            key = model_key(ticker, X, y, factory, params)
+            print(f"Refitted model for {ticker} ({reason})")
+
+        self.put(key, model)
+        self._write_head(lineage, {'key': key, 'rows': len(X), 'fingerprint': data_fingerprint(X, y),
+                                   'added_trees': added_trees})
+        return model
+
+
+_default_registry = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
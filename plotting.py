@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import plotly
+from flask import Response, abort, request
+from plotly.offline import get_plotlyjs
+
+# plotly.js is versioned in its URL, so browsers may keep it for good
+PLOTLY_JS_MAX_AGE = 365 * 24 * 3600
+
+# Price lines are downsampled to about this many points; 0 plots every bar
+PLOT_MAX_POINTS = int(os.environ.get('PLOT_MAX_POINTS', '2000'))
+
+# Figures of a report are fixed once built, but reports are only kept for a while
+FIGURE_MAX_AGE = 3600
+
+_bundle = None
+
+
+def _with_etag(body: bytes) -> tuple:
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def _plotly_js() -> tuple:
+    """The plotly.js bundle shipped with the installed plotly package, and its ETag."""
+    global _bundle
+    if _bundle is None:
+        _bundle = _with_etag(get_plotlyjs().encode())
+    return _bundle
+
+
+def _cacheable_response(payload: tuple, mimetype: str, cache_control: str) -> Response:
+    """Response for a (body, ETag) payload; 304 when the browser already has it."""
+    body, etag = payload
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def plotly_js_response(version: str) -> Response:
+    """Serve plotly.js once per browser: long-lived, immutable and revalidated by ETag."""
+    if version != plotly.__version__:
+        abort(404)
+    return _cacheable_response(_plotly_js(), 'application/javascript',
+                               f'public, max-age={PLOTLY_JS_MAX_AGE}, immutable')
+
+
+def figure_payload(fig) -> tuple:
+    """A figure's JSON and its ETag, built once and served by figure_response."""
+    return _with_etag(fig.to_json().encode())
+
+
+def figure_response(payload: tuple) -> Response:
+    """Serve one figure's JSON; a report's figures never change, so browsers may reuse them."""
+    return _cacheable_response(payload, 'application/json', f'private, max-age={FIGURE_MAX_AGE}')
+
+
+def lttb_indices(y: np.ndarray, target: int) -> np.ndarray:
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling of ``y`` to ``target`` points.
+
+    The first and last points are always kept. The rest are split into
+    ``target - 2`` buckets, and each bucket keeps the point forming the largest
+    triangle with the previous kept point and the mean of the next bucket, so
+    peaks and troughs survive.
+    """
+    n = len(y)
+    if target >= n or target < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    edges = (np.arange(target - 1) * ((n - 2) / (target - 2))).astype(int) + 1
+    edges[-1] = n - 1
+    kept = np.empty(target, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(target - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def _bar_positions(index: pd.DatetimeIndex, dates) -> np.ndarray:
+    """Positions in ``index`` of the bars falling on ``dates`` (dates, strings or timestamps, mixed)."""
+    days = index.tz_localize(None) if index.tz is not None else index
+    # Marker dates mix tz-aware bar timestamps with plain dates, so compare calendar days
+    wanted = pd.to_datetime([str(pd.Timestamp(d).date()) for d in dates if not pd.isna(d) and d != 'N/A'])
+    positions = days.normalize().get_indexer(wanted)
+    return positions[positions >= 0]
+
+
+def downsample_line(series: pd.Series, keep_dates=(), max_points: int = PLOT_MAX_POINTS) -> pd.Series:
+    """A price line reduced to about ``max_points`` points with LTTB, keeping the bars on ``keep_dates`` exactly.
+
+    ``keep_dates`` are the buy and sell dates drawn as markers, so every
+    marker sits on a point of the line.
+    """
+    if not max_points or len(series) <= max_points:
+        return series
+    kept = lttb_indices(series.to_numpy(dtype=float), max_points)
+    kept = np.union1d(kept, _bar_positions(series.index, keep_dates))
+    return series.iloc[kept]
@@ -0,0 +1,186 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_inference import forest_predict_proba
+from scanner import parse_tickers
+
+# Where the pooled model is written by `python pooled_model.py` and read by the app
+POOLED_MODEL_PATH = os.environ.get('POOLED_MODEL_PATH', 'cache/pooled_model.joblib')
+
+# Scale-free features, so one model can serve tickers of any price or volume level
+POOLED_FEATURES = ['RelativeVolume', 'Close/10DaySMA', 'Close/50DaySMA', '10DaySMA/50DaySMA', 'PriceChange',
+                   'RSI', 'MACD (%)', 'MACD_Signal (%)']
+
+POOLED_PARAMS = {'n_estimators': 300, 'max_depth': 12, 'min_samples_leaf': 5, 'random_state': 42, 'n_jobs': -1}
+
+_INDICATORS = ['20DayAvgVolume', '10DaySMA', '50DaySMA', 'PriceChange', 'RSI', 'MACD', 'MACD_Signal']
+
+
+def pooled_features(ticker: str, data: pd.DataFrame) -> pd.DataFrame:
+    """Normalized model features of one price history, NaN during indicator warm-up."""
+    from feature_store import get_feature_store
+
+    indicators = get_feature_store().features(ticker, data, _INDICATORS)
+    close = data['Close']
+    return pd.DataFrame({
+        'RelativeVolume': data['Volume'] / indicators['20DayAvgVolume'],
+        'Close/10DaySMA': close / indicators['10DaySMA'],
+        'Close/50DaySMA': close / indicators['50DaySMA'],
+        '10DaySMA/50DaySMA': indicators['10DaySMA'] / indicators['50DaySMA'],
+        'PriceChange': indicators['PriceChange'],
+        'RSI': indicators['RSI'],
+        'MACD (%)': indicators['MACD'] / close * 100,
+        'MACD_Signal (%)': indicators['MACD_Signal'] / close * 100,
+    }, index=data.index, columns=POOLED_FEATURES).replace([np.inf, -np.inf], np.nan)
+
+
+def breakout_labels(features: pd.DataFrame, volume_threshold: float, price_change: float) -> pd.Series:
+    """Volume and price breakout on the same bar, as labelled by predict_breakouts_with_ml."""
+    return ((features['RelativeVolume'] > volume_threshold / 100)
+            & (features['PriceChange'] > price_change)).astype(int)
+
+
+def _feature_chunk(prices: dict, volume_threshold: float, price_change: float) -> pd.DataFrame:
+    """Worker: labelled feature rows of a fetched chunk of tickers."""
+    frames = []
+    for ticker, data in prices.items():
+        if data.empty:
+            continue
+        features = pooled_features(ticker, data).dropna()
+        features['Label'] = breakout_labels(features, volume_threshold, price_change)
+        features.insert(0, 'Ticker', ticker)
+        frames.append(features)
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+
+def build_training_set(tickers: list, start_date: str, end_date: str, volume_threshold: float,
+                       price_change: float, chunk_size: int = 50, max_workers: int = None) -> pd.DataFrame:
+    """Labelled feature rows of a whole universe, built in parallel chunks.
+
+    Chunks are fetched in this process, so every download shares its
+    provider's rate limit, and their features are built in a process pool.
+    """
+    from providers import get_provider
+
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    frames = []
+    if chunks:
+        # Spawned workers do not inherit the parent's fetch threads or locks
+        context = multiprocessing.get_context('spawn')
+        workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_feature_chunk, get_provider().fetch_many(chunk, start_date, end_date),
+                                   volume_threshold, price_change)
+                       for chunk in chunks]
+            for future in futures:
+                try:
+                    frames.append(future.result())
+                except Exception as e:
+                    print(f"Error building features for chunk: {e}")
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames) if frames else pd.DataFrame(columns=['Ticker', *POOLED_FEATURES, 'Label'])
+
+
+def train_pooled_model(tickers: list, start_date: str, end_date: str, volume_threshold: float = 150,
+                       price_change: float = 2, params: dict = None, path: str = POOLED_MODEL_PATH,
+                       chunk_size: int = 50, max_workers: int = None) -> dict:
+    """Fit one forest on the rows of every ticker, using all cores, and save it to ``path``."""
+    training = build_training_set(tickers, start_date, end_date, volume_threshold, price_change,
+                                  chunk_size, max_workers)
+    if training.empty:
+        raise ValueError("No training rows for the given tickers and date range")
+    model = RandomForestClassifier(**(params or POOLED_PARAMS))
+    model.fit(training[POOLED_FEATURES].to_numpy(), training['Label'].to_numpy())
+
+    bundle = {
+        'model': model,
+        'features': POOLED_FEATURES,
+        'volume_threshold': volume_threshold,
+        'price_change': price_change,
+        'tickers': sorted(training['Ticker'].unique()),
+        'rows': len(training),
+        'trained': datetime.now().isoformat(timespec='seconds'),
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump(bundle, temp_path)
+    os.replace(temp_path, path)
+    print(f"Trained pooled model on {bundle['rows']} rows of {len(bundle['tickers'])} tickers")
+    return bundle
+
+
+_loaded = {}
+
+
+def load_pooled_model(path: str = POOLED_MODEL_PATH) -> dict:
+    """Return the saved pooled model bundle, or None; reloaded only when the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, joblib.load(path))
+        # Serving uses one thread per request; the forest is already fitted
+        cached[1]['model'].set_params(n_jobs=1)
+        _loaded[path] = cached
+    return cached[1]
+
+
+def predict_universe(prices: dict, bundle: dict = None) -> pd.DataFrame:
+    """Breakout predictions for every bar of every ticker in ``prices`` with one batched predict.
+
+    Returns a frame indexed by date with Ticker, Probability and Predicted
+    columns; bars still in indicator warm-up are left out.
+    """
+    bundle = bundle or load_pooled_model()
+    if bundle is None:
+        raise FileNotFoundError(f"No pooled model at {POOLED_MODEL_PATH}; run pooled_model.py first")
+    frames = []
+    for ticker, data in prices.items():
+        features = pooled_features(ticker, data).dropna()
+        features.insert(0, 'Ticker', ticker)
+        frames.append(features)
+    rows = pd.concat(frames) if frames else pd.DataFrame(columns=['Ticker', *bundle['features']])
+
+    model = bundle['model']
+    probability = np.zeros(len(rows))
+    if len(rows) and 1 in model.classes_:
+        proba = forest_predict_proba(model, rows[bundle['features']].to_numpy())
+        probability = proba[:, list(model.classes_).index(1)]
+    return pd.DataFrame({'Ticker': rows['Ticker'], 'Probability': probability, 'Predicted': probability > 0.5},
+                        index=rows.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train one breakout model across a ticker universe.")
+    parser.add_argument('tickers', nargs='*', help="Tickers to train on")
+    parser.add_argument('--file', help="File with tickers, comma- or whitespace-separated")
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--volume-threshold', type=float, default=150)
+    parser.add_argument('--price-change', type=float, default=2)
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', default=POOLED_MODEL_PATH, help="Where to save the model")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers += parse_tickers(f.read())
+    train_pooled_model(tickers, args.start_date, args.end_date, args.volume_threshold, args.price_change,
+                       path=args.output, chunk_size=args.chunk_size, max_workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
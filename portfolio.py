@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _trading_calendar(prices: dict) -> tuple:
+    """Union calendar of all tickers and a (days, tickers) matrix of forward-filled closes."""
+    closes = {}
+    for ticker, data in prices.items():
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        closes[ticker] = pd.Series(data['Close'].to_numpy(dtype=float), index=index.normalize())
+    frame = pd.DataFrame(closes).sort_index().ffill()
+    return frame.index, frame.to_numpy()
+
+
+def simulate_portfolio(trades: pd.DataFrame, prices: dict, initial_capital: float = 100000.0,
+                       position_size: float = 0.1, max_positions: int = 10, commission: float = 0.0,
+                       commission_bps: float = 0.0, slippage_bps: float = 5.0) -> tuple:
+    """Replay strategy signals as one portfolio with shared capital.
+
+    ``trades`` is any calculate_returns output (or several concatenated),
+    optionally with a Ticker column; without one, ``prices`` must hold a single
+    ticker. A trade enters at the close of its Buy Date (Breakout Date when
+    there is no Buy Date) and exits at the close of its Sell Date, or is held
+    to the end when it has none. Each entry is sized at ``position_size`` of
+    current equity, limited by cash, and skipped when ``max_positions`` are
+    already open. Exits are processed before entries on the same day. Costs are
+    a fixed ``commission`` plus ``commission_bps`` of notional per fill, and
+    fills are ``slippage_bps`` worse than the close.
+
+    Returns (equity_curve, fills): a daily frame of Cash, Holdings, Equity and
+    Open Positions, and one row per trade taken or skipped.
+    """
+    calendar, closes = _trading_calendar(prices)
+    tickers = list(prices)
+    n_days = len(calendar)
+
+    trades = trades[~trades['Strategy'].astype(str).str.startswith('---')] if 'Strategy' in trades else trades
+    if 'Ticker' in trades:
+        trades = trades[trades['Ticker'].isin(tickers)]
+        ticker_index = trades['Ticker'].map({t: i for i, t in enumerate(tickers)}).to_numpy()
+    else:
+        ticker_index = np.zeros(len(trades), dtype=int)
+    entry_column = 'Buy Date' if 'Buy Date' in trades else 'Breakout Date'
+    entry_dates = pd.to_datetime(trades[entry_column])
+    exit_dates = pd.to_datetime(trades['Sell Date'])
+    entry_day = calendar.searchsorted(entry_dates)
+    exit_day = np.where(exit_dates.isna(), n_days, calendar.searchsorted(exit_dates.fillna(calendar[0])))
+
+    # Signals in entry order; the original order breaks ties between same-day signals
+    order = np.argsort(entry_day, kind='stable')
+    entry_day, exit_day, ticker_index = entry_day[order], exit_day[order], ticker_index[order]
+
+    # Fixed-size slot arrays hold the open positions
+    slot_open = np.zeros(max_positions, dtype=bool)
+    slot_ticker = np.zeros(max_positions, dtype=int)
+    slot_shares = np.zeros(max_positions)
+    slot_exit = np.zeros(max_positions, dtype=int)
+    slot_trade = np.zeros(max_positions, dtype=int)
+
+    slippage = slippage_bps / 10000
+    fee_rate = commission_bps / 10000
+    cash = initial_capital
+    equity_curve = np.zeros((n_days, 4))
+    fill_shares = np.zeros(len(order))
+    fill_entry = np.full(len(order), np.nan)
+    fill_exit = np.full(len(order), np.nan)
+    fill_cost = np.zeros(len(order))
+    fill_pnl = np.full(len(order), np.nan)
+    taken = np.zeros(len(order), dtype=bool)
+
+    next_trade = 0
+    for day in range(n_days):
+        prices_today = closes[day]
+
+        for slot in np.flatnonzero(slot_open & (slot_exit == day)):
+            trade = slot_trade[slot]
+            fill_exit[trade] = prices_today[slot_ticker[slot]] * (1 - slippage)
+            proceeds = slot_shares[slot] * fill_exit[trade]
+            proceeds -= commission + proceeds * fee_rate
+            cash += proceeds
+            fill_pnl[trade] = proceeds - fill_cost[trade]
+            slot_open[slot] = False
+
+        holdings = np.nansum(slot_shares[slot_open] * prices_today[slot_ticker[slot_open]])
+        equity = cash + holdings
+        while next_trade < len(order) and entry_day[next_trade] <= day:
+            trade = next_trade
+            next_trade += 1
+            price = prices_today[ticker_index[trade]] * (1 + slippage)
+            free = np.flatnonzero(~slot_open)
+            if not len(free) or not price > 0 or exit_day[trade] <= day:
+                continue
+            notional = min(equity * position_size, cash - commission) / (1 + fee_rate)
+            if notional <= 0:
+                continue
+            slot = free[0]
+            slot_open[slot] = True
+            slot_ticker[slot] = ticker_index[trade]
+            slot_shares[slot] = notional / price
+            slot_exit[slot] = exit_day[trade]
+            slot_trade[slot] = trade
+            fill_cost[trade] = notional + commission + notional * fee_rate
+            cash -= fill_cost[trade]
+            taken[trade] = True
+            fill_shares[trade] = notional / price
+            fill_entry[trade] = price
+
+        holdings = np.nansum(slot_shares[slot_open] * prices_today[slot_ticker[slot_open]])
+        equity_curve[day] = (cash, holdings, cash + holdings, slot_open.sum())
+
+    curve = pd.DataFrame(equity_curve, index=calendar, columns=['Cash', 'Holdings', 'Equity', 'Open Positions'])
+    curve['Open Positions'] = curve['Open Positions'].astype(int)
+    curve.attrs['initial_capital'] = initial_capital
+
+    fills = trades.iloc[order].reset_index(drop=True)
+    fills['Taken'] = taken
+    fills['Shares'] = fill_shares
+    fills['Fill Buy Price'] = fill_entry
+    fills['Fill Sell Price'] = fill_exit
+    fills['PnL'] = fill_pnl
+    return curve, fills
+
+
+def portfolio_summary(curve: pd.DataFrame, fills: pd.DataFrame) -> dict:
+    """Headline figures for a simulated equity curve."""
+    equity = curve['Equity']
+    initial_capital = curve.attrs.get('initial_capital', equity.iloc[0])
+    years = max(len(equity) / TRADING_DAYS_PER_YEAR, 1 / TRADING_DAYS_PER_YEAR)
+    drawdown = equity / np.maximum(equity.cummax(), initial_capital) - 1
+    return {
+        "Final Equity": equity.iloc[-1],
+        "Total Return (%)": (equity.iloc[-1] / initial_capital - 1) * 100,
+        "CAGR (%)": ((equity.iloc[-1] / initial_capital) ** (1 / years) - 1) * 100,
+        "Maximum Drawdown (%)": -drawdown.min() * 100,
+        "Trades Taken": int(fills['Taken'].sum()),
+        "Trades Skipped": int((~fills['Taken']).sum()),
+    }
@@ -0,0 +1,181 @@
+import abc
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import feather
+import yfinance as yf
+
+from data_cache import CACHE_DIR, OHLCVCache
+from fetcher import ConcurrentFetcher, RateLimiter
+
+# Provider used by the web apps: "yfinance" (default), "local" or "stub"
+PROVIDER_NAME = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+
+# Directory read by the local provider, one file per ticker
+DATA_DIR = os.environ.get('MARKET_DATA_DIR', 'data')
+
+# Upper bound on Yahoo Finance downloads per second, per process
+YFINANCE_RATE_LIMIT = float(os.environ.get('YFINANCE_RATE_LIMIT', '2'))
+
+# File extensions the local provider looks for, in order of preference
+LOCAL_EXTENSIONS = ('.arrow', '.feather', '.parquet', '.csv')
+
+
+class MarketDataProvider(abc.ABC):
+    """Source of daily OHLCV bars.
+
+    Implementations return a DataFrame indexed by date with at least the
+    Open, High, Low, Close and Volume columns for [start_date, end_date),
+    or an empty DataFrame when nothing is available.
+    """
+
+    @abc.abstractmethod
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        ...
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Download bars from Yahoo Finance through yfinance, optionally rate limited."""
+
+    def __init__(self, rate_limiter: RateLimiter = None):
+        self.rate_limiter = rate_limiter
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return yf.Ticker(ticker).history(start=start_date, end=end_date)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """Read bars from per-ticker files in a directory, without any network access.
+
+    Files are named ``<TICKER>.<ext>`` and may be Arrow IPC/Feather (V1 or
+    V2), Parquet or CSV. The date is taken from the index or from a ``Date``
+    column. Arrow files are memory-mapped and filtered to the requested dates
+    before conversion, so only those bars are copied into pandas.
+    """
+
+    def __init__(self, directory: str = DATA_DIR):
+        self.directory = directory
+
+    def _find(self, ticker: str):
+        for name in (ticker, ticker.upper()):
+            for ext in LOCAL_EXTENSIONS:
+                path = os.path.join(self.directory, name + ext)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    @staticmethod
+    def _date_column(table: pa.Table):
+        """Name of the column holding the dates: ``Date``, else the saved pandas index."""
+        if 'Date' in table.column_names:
+            return 'Date'
+        index_columns = (table.schema.pandas_metadata or {}).get('index_columns', [])
+        return next((name for name in index_columns if isinstance(name, str)), None)
+
+    def _read_arrow(self, path: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        table = feather.read_table(path, memory_map=True)
+        column = self._date_column(table)
+        if column is not None and pa.types.is_timestamp(table.schema.field(column).type):
+            date_type = table.schema.field(column).type
+            if date_type.tz is not None:
+                start, end = start.tz_localize(date_type.tz), end.tz_localize(date_type.tz)
+            dates = table[column]
+            table = table.filter(pc.and_(pc.greater_equal(dates, pa.scalar(start, type=date_type)),
+                                         pc.less(dates, pa.scalar(end, type=date_type))))
+        return table.to_pandas()
+
+    def _read(self, path: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        if path.endswith(('.arrow', '.feather')):
+            data = self._read_arrow(path, start, end)
+        elif path.endswith('.parquet'):
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path)
+
+        if 'Date' in data.columns:
+            data = data.set_index('Date')
+        if not isinstance(data.index, pd.DatetimeIndex):
+            data.index = pd.to_datetime(data.index)
+        if not isinstance(data.index, pd.DatetimeIndex):
+            # Offsets that change with DST (e.g. yfinance CSV dumps) parse as objects
+            data.index = pd.to_datetime(data.index, utc=True).tz_convert('America/New_York')
+        data.index.name = 'Date'
+        return data if data.index.is_monotonic_increasing else data.sort_index()
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        path = self._find(ticker)
+        if path is None:
+            print(f"No local data file for {ticker} in {self.directory}")
+            return pd.DataFrame()
+
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        data = self._read(path, start, end)
+        tz = data.index.tz
+        if tz is not None:
+            start, end = start.tz_localize(tz), end.tz_localize(tz)
+        return data[(data.index >= start) & (data.index < end)]
+
+
+class StubProvider(MarketDataProvider):
+    """Synthetic random-walk bars returned after a simulated network latency.
+
+    The series for a ticker is deterministic, so repeated calls agree. Used for
+    load tests and for exercising the fetch layer without network access;
+    ``calls`` counts how many downloads actually happened.
+    """
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+        index = pd.bdate_range(start_date, end_date, inclusive='left', tz='America/New_York', name='Date')
+        seed = zlib.crc32(ticker.upper().encode())
+        # Draw one step per calendar day from a fixed origin so overlapping
+        # ranges of the same ticker return identical bars
+        days = (index.tz_localize(None) - pd.Timestamp('1970-01-01')).days.to_numpy()
+        n_days = days[-1] + 1 if len(days) else 0
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.015, n_days)))[days]
+        volume = np.random.default_rng(seed + 1).lognormal(14, 0.5, n_days)[days].round()
+        return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                             'Close': close, 'Volume': volume}, index=index)
+
+
+def create_provider(name: str = PROVIDER_NAME) -> MarketDataProvider:
+    """Build the provider called ``name``.
+
+    Every provider sits behind a ConcurrentFetcher so concurrent identical
+    requests share one fetch; yfinance is also rate limited and cached on disk.
+    """
+    if name == 'local':
+        return ConcurrentFetcher(LocalFileProvider(DATA_DIR))
+    if name == 'stub':
+        return ConcurrentFetcher(StubProvider())
+    if name == 'yfinance':
+        return ConcurrentFetcher(OHLCVCache(YFinanceProvider(RateLimiter(YFINANCE_RATE_LIMIT)), CACHE_DIR))
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+_default_provider = None
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide provider selected by MARKET_DATA_PROVIDER."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = create_provider()
+    return _default_provider
@@ -0,0 +1,109 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# SQLite file shared by all workers on this host
+REPORT_DB = os.environ.get('REPORT_DB', 'cache/reports.sqlite3')
+
+# Report items kept unpickled in memory per process
+REPORT_CACHE_ENTRIES = int(os.environ.get('REPORT_CACHE_ENTRIES', '64'))
+
+# Seconds a report stays available after it was generated
+REPORT_TTL = float(os.environ.get('REPORT_TTL', str(24 * 3600)))
+
+# Seconds between deletions of expired reports from the database
+_PRUNE_INTERVAL = 60
+
+
+class ReportStore:
+    """Generated report items (CSV bytes, plot data, figures) keyed by report ID and item name.
+
+    Every item is written through to SQLite, so any worker process can serve
+    any report; recently used items are also kept in a per-process LRU of
+    ``memory_entries``. Reports expire ``ttl`` seconds after they were stored.
+    """
+
+    def __init__(self, path: str = REPORT_DB, memory_entries: int = REPORT_CACHE_ENTRIES, ttl: float = REPORT_TTL):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_prune = 0.0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS report_items ('
+                       'report_id TEXT, name TEXT, created REAL, payload BLOB, PRIMARY KEY (report_id, name))')
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared between threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def _remember(self, key: tuple, created: float, value) -> None:
+        with self._lock:
+            self._memory[key] = (created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, report_id: str, name: str, value) -> None:
+        """Store one item of a report; items are immutable once stored."""
+        created = time.time()
+        with self._connection() as db:
+            db.execute('INSERT OR REPLACE INTO report_items VALUES (?, ?, ?, ?)',
+                       (report_id, name, created, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._remember((report_id, name), created, value)
+        if created - self._last_prune > _PRUNE_INTERVAL:
+            self.prune()
+
+    def get(self, report_id: str, name: str):
+        """Return an item of a report, or None when it is unknown or expired."""
+        key = (report_id, name)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            row = self._connection().execute('SELECT created, payload FROM report_items WHERE report_id = ? AND name = ?',
+                                             key).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], pickle.loads(row[1]))
+            self._remember(key, *entry)
+        created, value = entry
+        return value if now - created <= self.ttl else None
+
+    def prune(self) -> None:
+        """Delete expired reports from the database and memory."""
+        cutoff = time.time() - self.ttl
+        self._last_prune = time.time()
+        with self._connection() as db:
+            db.execute('DELETE FROM report_items WHERE created < ?', (cutoff,))
+        with self._lock:
+            for key in [key for key, (created, _) in self._memory.items() if created < cutoff]:
+                del self._memory[key]
+
+
+_default_store = None
+
+
+def get_report_store() -> ReportStore:
+    """Return the process-wide report store."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ReportStore()
+    return _default_store
@@ -0,0 +1,107 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Computed reports (trades table and metrics) kept in memory per process
+RESULT_CACHE_ENTRIES = int(os.environ.get('RESULT_CACHE_ENTRIES', '128'))
+RESULT_CACHE_BYTES = int(os.environ.get('RESULT_CACHE_BYTES', str(64 * 1024 * 1024)))
+
+# Seconds a computed result is reused for identical parameters and data
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '3600'))
+
+
+def normalize_params(**params) -> tuple:
+    """Canonical form of report parameters, so equivalent form submissions share a cache entry.
+
+    Tickers are stripped and upper-cased, dates become ISO dates and numbers
+    become floats (so ``'2'``, ``'2.0'`` and ``2`` are the same threshold).
+    Nested dicts (such as risk levels) are normalized the same way.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if name == 'ticker':
+            value = value.strip().upper()
+        elif isinstance(value, dict):
+            value = normalize_params(**value)
+        elif name.endswith('_date'):
+            value = pd.Timestamp(value).date().isoformat()
+        elif isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        normalized[name] = value
+    return tuple(sorted(normalized.items()))
+
+
+class ResultCache:
+    """Computed results keyed by normalized parameters, each tagged with the data version it was computed from.
+
+    A lookup with a different data version is a miss and drops the entry, so
+    results are invalidated as soon as the price data they came from is
+    refreshed. Entries expire ``ttl`` seconds after they were stored, and the
+    least recently used ones are evicted beyond ``max_entries`` or
+    ``max_bytes`` (measured as pickled size).
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_ENTRIES, max_bytes: int = RESULT_CACHE_BYTES,
+                 ttl: float = RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, key: tuple) -> None:
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: tuple, version: str):
+        """The result stored for ``key`` and data ``version``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] != version or time.time() - entry[1] > self.ttl):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: tuple, version: str, value) -> None:
+        """Store a result; it must not be mutated afterwards."""
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, time.time(), value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_default_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
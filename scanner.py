@@ -0,0 +1,113 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+# Calendar days of history fetched per ticker; enough for the 20-day volume average
+LOOKBACK_DAYS = 60
+
+# Most tickers one /scan request may fetch; at the yfinance rate limit larger
+# universes outlast a web worker's request timeout, so scan them with this script
+SCAN_MAX_TICKERS = int(os.environ.get('SCAN_MAX_TICKERS', '40'))
+
+SCAN_COLUMNS = ['Ticker', 'Date', 'Close', 'Volume', '20DayAvgVolume', 'VolumeRatio', 'PriceChange']
+
+
+def _scan_chunk(prices: dict, volume_threshold: float, price_change: float) -> list:
+    """Worker: keep the tickers of a fetched chunk that break out on their latest bar."""
+    # Imported here so worker processes load the app module themselves
+    from app_basic import identify_breakouts
+
+    hits = []
+    for ticker, data in prices.items():
+        if len(data) < 21:
+            continue
+        breakout_days = identify_breakouts(data, volume_threshold, price_change)
+        if breakout_days.empty or breakout_days.index[-1] != data.index[-1]:
+            continue
+        bar = breakout_days.iloc[-1]
+        hits.append({
+            'Ticker': ticker,
+            'Date': breakout_days.index[-1].date(),
+            'Close': bar['Close'],
+            'Volume': bar['Volume'],
+            '20DayAvgVolume': bar['20DayAvgVolume'],
+            'VolumeRatio': bar['Volume'] / bar['20DayAvgVolume'],
+            'PriceChange': bar['PriceChange'],
+        })
+    return hits
+
+
+def scan_universe(tickers: list, volume_threshold: float, price_change: float, end_date: str = None,
+                  lookback_days: int = LOOKBACK_DAYS, chunk_size: int = 100, max_workers: int = None) -> pd.DataFrame:
+    """Return the tickers whose latest bar is a volume and price breakout, strongest first.
+
+    Each chunk of tickers is fetched concurrently in this process, so every
+    download shares its provider's rate limit, and then scanned in a process
+    pool while the next chunk downloads.
+    """
+    from providers import get_provider
+
+    if end_date is None:
+        end_date = str(date.today() + timedelta(days=1))
+    start_date = str((pd.Timestamp(end_date) - pd.Timedelta(days=lookback_days)).date())
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+    hits = []
+    if chunks:
+        # Spawned workers do not inherit the parent's fetch threads or locks
+        context = multiprocessing.get_context('spawn')
+        workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_scan_chunk, get_provider().fetch_many(chunk, start_date, end_date),
+                                   volume_threshold, price_change)
+                       for chunk in chunks]
+            for future in futures:
+                try:
+                    hits.extend(future.result())
+                except Exception as e:
+                    print(f"Error scanning chunk: {e}")
+
+    results = pd.DataFrame(hits, columns=SCAN_COLUMNS)
+    results = results.sort_values(['VolumeRatio', 'PriceChange'], ascending=False, ignore_index=True)
+    results.index += 1
+    print(f"Scanned {len(tickers)} tickers, {len(results)} breaking out")
+    return results
+
+
+def parse_tickers(text: str) -> list:
+    """Split a comma- or whitespace-separated ticker list."""
+    return [t for t in text.replace(',', ' ').split() if t]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a ticker universe for breakouts on the latest bar.")
+    parser.add_argument('tickers', nargs='*', help="Tickers to scan")
+    parser.add_argument('--file', help="File with tickers, comma- or whitespace-separated")
+    parser.add_argument('--volume-threshold', type=float, required=True)
+    parser.add_argument('--price-change', type=float, required=True)
+    parser.add_argument('--end-date', help="Exclusive end date (default: include today)")
+    parser.add_argument('--lookback-days', type=int, default=LOOKBACK_DAYS)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="Write the ranked hits to this CSV file")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers += parse_tickers(f.read())
+
+    results = scan_universe(tickers, args.volume_threshold, args.price_change, args.end_date,
+                            args.lookback_days, args.chunk_size, args.workers)
+    print(results.to_string(float_format="%.2f"))
+    if args.output:
+        results.to_csv(args.output, index_label='Rank', float_format="%.2f")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Volume average window, as in identify_breakouts
+WINDOW = 20
+
+
+class TickerState:
+    """Rolling state for one ticker: the last ``window`` volumes and the previous close."""
+
+    __slots__ = ('volumes', 'position', 'count', 'volume_sum', 'prev_close')
+
+    def __init__(self, window: int = WINDOW):
+        self.volumes = np.zeros(window)
+        self.position = 0
+        self.count = 0
+        self.volume_sum = 0.0
+        self.prev_close = None
+
+    def push(self, close: float, volume: float) -> None:
+        """Append a completed bar in O(1)."""
+        self.volume_sum += volume - self.volumes[self.position]
+        self.volumes[self.position] = volume
+        self.position = (self.position + 1) % len(self.volumes)
+        self.count = min(self.count + 1, len(self.volumes))
+        self.prev_close = close
+
+    def average_volume(self) -> float:
+        """Average of the last ``window`` volumes, or NaN until the window is full."""
+        return self.volume_sum / self.count if self.count == len(self.volumes) else np.nan
+
+    def to_dict(self) -> dict:
+        # Store the window oldest-first so restoring does not depend on the ring position
+        ordered = np.roll(self.volumes, -self.position)[len(self.volumes) - self.count:]
+        return {'volumes': ordered.tolist(), 'window': len(self.volumes), 'prev_close': self.prev_close}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'TickerState':
+        ticker_state = cls(state['window'])
+        for volume in state['volumes']:
+            ticker_state.push(None, volume)
+        ticker_state.prev_close = state['prev_close']
+        return ticker_state
+
+
+class StreamingBreakoutDetector:
+    """Incremental version of identify_breakouts for live bars across a watchlist.
+
+    A bar is a breakout when its volume exceeds (1 + volume_threshold / 100)
+    times the average of the previous 20 volumes (the shifted average used in
+    app_basic.py) and its close is up more than price_change percent on the
+    previous close. Each new bar costs O(1) per ticker, without revisiting
+    history.
+
+    ``evaluate`` checks a bar without committing it, e.g. a still-forming
+    intraday bar; ``update`` checks a completed bar and adds it to the state.
+    """
+
+    def __init__(self, volume_threshold: float, price_change: float, window: int = WINDOW):
+        self.volume_threshold = volume_threshold
+        self.price_change = price_change
+        self.window = window
+        self.states = {}
+
+    def warm_up(self, ticker: str, data: pd.DataFrame) -> None:
+        """Seed a ticker's state from the tail of its daily history."""
+        state = TickerState(self.window)
+        for close, volume in zip(data['Close'].to_numpy()[-self.window:], data['Volume'].to_numpy()[-self.window:]):
+            state.push(float(close), float(volume))
+        self.states[ticker] = state
+
+    def evaluate(self, ticker: str, close: float, volume: float) -> dict:
+        """Classify a bar against the current state without changing it."""
+        state = self.states.get(ticker)
+        if state is None:
+            state = self.states[ticker] = TickerState(self.window)
+
+        average_volume = state.average_volume()
+        volume_breakout = bool(volume > (1 + self.volume_threshold / 100) * average_volume)
+        if state.prev_close:
+            change = (close / state.prev_close - 1) * 100
+        else:
+            change = np.nan
+        price_breakout = bool(change > self.price_change)
+        return {
+            'Ticker': ticker,
+            'Close': close,
+            'Volume': volume,
+            '20DayAvgVolume': average_volume,
+            'PriceChange': change,
+            'VolumeBreakout': volume_breakout,
+            'PriceBreakout': price_breakout,
+            'Breakout': volume_breakout and price_breakout,
+        }
+
+    def update(self, ticker: str, close: float, volume: float) -> dict:
+        """Classify a completed bar, then roll it into the ticker's state."""
+        result = self.evaluate(ticker, close, volume)
+        self.states[ticker].push(close, volume)
+        return result
+
+    def update_many(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """Apply ``update`` to a frame of bars with Ticker, Close and Volume columns."""
+        results = [self.update(ticker, close, volume)
+                   for ticker, close, volume in zip(bars['Ticker'], bars['Close'], bars['Volume'])]
+        return pd.DataFrame(results)
+
+    def checkpoint(self, path: str) -> None:
+        """Write thresholds and per-ticker state to a JSON file."""
+        snapshot = {
+            'volume_threshold': self.volume_threshold,
+            'price_change': self.price_change,
+            'window': self.window,
+            'states': {ticker: state.to_dict() for ticker, state in self.states.items()},
+        }
+        with open(path, 'w') as f:
+            json.dump(snapshot, f)
+
+    @classmethod
+    def restore(cls, path: str) -> 'StreamingBreakoutDetector':
+        """Rebuild a detector from a checkpoint written by ``checkpoint``."""
+        with open(path) as f:
+            snapshot = json.load(f)
+        detector = cls(snapshot['volume_threshold'], snapshot['price_change'], snapshot['window'])
+        detector.states = {ticker: TickerState.from_dict(state) for ticker, state in snapshot['states'].items()}
+        return detector
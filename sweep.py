@@ -0,0 +1,126 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Parameter combinations scored per matrix product, to bound peak memory
+SWEEP_BLOCK = 512
+
+SWEEP_COLUMNS = ['Volume Threshold (%)', 'Price Change (%)', 'Holding Period',
+                 'Total Trades', 'Winning Trades', 'Win Rate (%)', 'Average Return (%)', 'Total Return (%)']
+
+
+def forward_returns(close: np.ndarray, holding_periods: np.ndarray, waiting_period: int) -> tuple:
+    """Return (returns, valid), both shaped (holding periods, bars).
+
+    Row h, column t is the percent return of a trade signalled on bar t, bought
+    ``waiting_period`` bars later and sold ``holding_periods[h]`` bars after
+    that. ``valid`` is False where the buy is on or after the last bar or the
+    sale falls outside the data, the same trades calculate_returns skips.
+    """
+    n = len(close)
+    buy_pos = np.arange(n) + waiting_period
+    sell_pos = buy_pos[None, :] + holding_periods[:, None]
+    valid = (buy_pos[None, :] < n - 1) & (sell_pos <= n - 1)
+
+    buy_price = close[np.minimum(buy_pos, n - 1)]
+    sell_price = close[np.minimum(sell_pos, n - 1)]
+    returns = np.where(valid, (sell_price - buy_price[None, :]) / buy_price[None, :] * 100, 0.0)
+    return returns, valid
+
+
+def sweep_parameters(data: pd.DataFrame, volume_thresholds, price_changes, holding_periods,
+                     waiting_period: int = 0) -> pd.DataFrame:
+    """Score every (volume_threshold, price_change, holding_period) combination at once.
+
+    Uses the same breakout rule as app_basic.identify_breakouts, broadcast over
+    all thresholds, and one forward-return matrix shared by all holding periods.
+    Returns one row per combination (long format; see sweep_heatmap).
+    """
+    volume_thresholds = np.asarray(volume_thresholds, dtype=float)
+    price_changes = np.asarray(price_changes, dtype=float)
+    holding_periods = np.asarray(holding_periods, dtype=int)
+
+    avg_volume = data['20DayAvgVolume'] if '20DayAvgVolume' in data else data['Volume'].rolling(window=20).mean().shift(1)
+    change = data['PriceChange'] if 'PriceChange' in data else data['Close'].pct_change() * 100
+
+    # Breakout masks per threshold: (volume thresholds, bars) and (price thresholds, bars)
+    volume_mask = data['Volume'].to_numpy()[None, :] > (1 + volume_thresholds[:, None] / 100) * avg_volume.to_numpy()[None, :]
+    price_mask = change.to_numpy()[None, :] > price_changes[:, None]
+
+    returns, valid = forward_returns(data['Close'].to_numpy(dtype=float), holding_periods, waiting_period)
+    wins = (valid & (returns > 0)).astype(float)
+    valid = valid.astype(float)
+
+    n_volume, n_price, n_bars = len(volume_thresholds), len(price_changes), len(data)
+    trades = np.empty((n_volume * n_price, len(holding_periods)))
+    winners = np.empty_like(trades)
+    total = np.empty_like(trades)
+    for start in range(0, n_volume * n_price, SWEEP_BLOCK):
+        combos = np.arange(start, min(start + SWEEP_BLOCK, n_volume * n_price))
+        mask = (volume_mask[combos // n_price] & price_mask[combos % n_price]).astype(float)
+        trades[combos] = mask @ valid.T
+        winners[combos] = mask @ wins.T
+        total[combos] = mask @ returns.T
+
+    grid_volume, grid_price, grid_holding = np.meshgrid(volume_thresholds, price_changes, holding_periods, indexing='ij')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        results = pd.DataFrame({
+            'Volume Threshold (%)': grid_volume.ravel(),
+            'Price Change (%)': grid_price.ravel(),
+            'Holding Period': grid_holding.ravel(),
+            'Total Trades': trades.ravel().astype(int),
+            'Winning Trades': winners.ravel().astype(int),
+            'Win Rate (%)': winners.ravel() / trades.ravel() * 100,
+            'Average Return (%)': total.ravel() / trades.ravel(),
+            'Total Return (%)': total.ravel(),
+        }, columns=SWEEP_COLUMNS)
+    print(f"Swept {len(results)} parameter combinations over {n_bars} bars")
+    return results
+
+
+def sweep_heatmap(results: pd.DataFrame, holding_period: int, value: str = 'Average Return (%)') -> pd.DataFrame:
+    """Pivot one holding period of a sweep into a volume x price threshold grid."""
+    subset = results[results['Holding Period'] == holding_period]
+    return subset.pivot(index='Volume Threshold (%)', columns='Price Change (%)', values=value)
+
+
+def main():
+    from providers import get_provider
+
+    parser = argparse.ArgumentParser(description="Sweep breakout thresholds and holding periods for one ticker.")
+    parser.add_argument('ticker')
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--volume-thresholds', nargs=3, type=float, default=[0, 500, 50],
+                        metavar=('MIN', 'MAX', 'STEPS'))
+    parser.add_argument('--price-changes', nargs=3, type=float, default=[0, 10, 50],
+                        metavar=('MIN', 'MAX', 'STEPS'))
+    parser.add_argument('--holding-periods', nargs=3, type=int, default=[1, 40, 20],
+                        metavar=('MIN', 'MAX', 'STEPS'))
+    parser.add_argument('--waiting-period', type=int, default=0)
+    parser.add_argument('--output', help="Write the full sweep to this CSV file")
+    args = parser.parse_args()
+
+    data = get_provider().history(args.ticker, args.start_date, args.end_date)
+    if data.empty:
+        print(f"No data found for {args.ticker}")
+        return
+
+    volume_min, volume_max, volume_steps = args.volume_thresholds
+    price_min, price_max, price_steps = args.price_changes
+    holding_min, holding_max, holding_steps = args.holding_periods
+    results = sweep_parameters(data,
+                               np.linspace(volume_min, volume_max, int(volume_steps)),
+                               np.linspace(price_min, price_max, int(price_steps)),
+                               np.unique(np.linspace(holding_min, holding_max, holding_steps).round().astype(int)),
+                               args.waiting_period)
+
+    best = results[results['Total Trades'] > 0].sort_values('Average Return (%)', ascending=False)
+    print(best.head(20).to_string(index=False, float_format="%.2f"))
+    if args.output:
+        results.to_csv(args.output, index=False, float_format="%.4f")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fetcher import ConcurrentFetcher, RateLimiter
+from providers import StubProvider
+
+LATENCY = 0.3
+
+
+def test_concurrent_identical_requests_share_one_fetch():
+    stub = StubProvider(latency=LATENCY)
+    fetcher = ConcurrentFetcher(stub)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(lambda _: fetcher.history('AAPL', '2020-01-01', '2021-01-01'), range(8)))
+
+    assert stub.calls == 1
+    assert fetcher.coalesced == 7
+    assert all(frame.equals(frames[0]) for frame in frames)
+
+
+def test_callers_get_their_own_copy():
+    fetcher = ConcurrentFetcher(StubProvider(latency=LATENCY))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first, second = pool.map(lambda _: fetcher.history('AAPL', '2020-01-01', '2021-01-01'), range(2))
+
+    assert first is not second
+    first['Close'] = 0.0
+    assert (second['Close'] > 0).all()
+
+
+def test_fetch_many_runs_in_parallel():
+    tickers = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'NVDA', 'META']
+    stub = StubProvider(latency=LATENCY)
+    fetcher = ConcurrentFetcher(stub, max_workers=len(tickers))
+
+    started = time.monotonic()
+    results = fetcher.fetch_many(tickers, '2020-01-01', '2021-01-01')
+    elapsed = time.monotonic() - started
+
+    assert stub.calls == len(tickers)
+    assert set(results) == set(tickers)
+    assert all(not frame.empty for frame in results.values())
+    # Sequential fetches would take len(tickers) latencies
+    assert elapsed < 2 * LATENCY
+
+
+def test_rate_limiter_spaces_calls():
+    rate = 20
+    limiter = RateLimiter(rate)
+    calls = []
+    for _ in range(6):
+        limiter.acquire()
+        calls.append(time.monotonic())
+
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    assert min(gaps) >= 0.9 / rate
+    assert calls[-1] - calls[0] >= 0.95 * 5 / rate
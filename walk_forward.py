@@ -0,0 +1,177 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sweep import sweep_parameters
+
+DEFAULT_GRID = {
+    'volume_thresholds': [50, 100, 150, 200, 300],
+    'price_changes': [1, 2, 3, 4],
+    'holding_periods': [5, 10, 20, 40],
+    'waiting_periods': [0, 1, 2],
+}
+
+PARAMETER_COLUMNS = ['Volume Threshold (%)', 'Price Change (%)', 'Holding Period', 'Waiting Period']
+
+
+def walk_forward_folds(n_bars: int, train_bars: int, test_bars: int) -> list:
+    """Rolling (train_start, train_end, test_end) bar positions; the test window follows the train window."""
+    folds = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        folds.append((start, start + train_bars, start + train_bars + test_bars))
+        start += test_bars
+    return folds
+
+
+def _train_scores(train: pd.DataFrame, alive: pd.DataFrame) -> pd.DataFrame:
+    """Average in-sample return of every surviving parameter set on one train window."""
+    scores = []
+    for waiting_period in alive['Waiting Period'].unique():
+        subset = alive[alive['Waiting Period'] == waiting_period]
+        # Sweep only the bounding grid of the parameter sets still alive
+        swept = sweep_parameters(train,
+                                 np.unique(subset['Volume Threshold (%)']),
+                                 np.unique(subset['Price Change (%)']),
+                                 np.unique(subset['Holding Period']),
+                                 int(waiting_period))
+        swept['Waiting Period'] = waiting_period
+        scores.append(swept)
+    scores = pd.concat(scores, ignore_index=True)
+    return alive.merge(scores, on=PARAMETER_COLUMNS, how='left')
+
+
+def walk_forward_ticker(ticker: str, start_date: str, end_date: str, grid: dict = None, train_bars: int = 504,
+                        test_bars: int = 126, min_trades: int = 5, prune_after: int = 3,
+                        data: pd.DataFrame = None) -> pd.DataFrame:
+    """Walk-forward optimise one ticker; returns one row of out-of-sample results per fold.
+
+    On each train window every surviving parameter set is scored by its
+    average return (sets with fewer than ``min_trades`` trades are ignored) and
+    the best one is traded on the following test window with
+    app_basic.identify_breakouts, calculate_returns and
+    calculate_performance_metrics. After ``prune_after`` folds, sets whose mean
+    train return so far is negative and below the median are dropped for good.
+    ``data`` is fetched when not given.
+    """
+    from app_basic import calculate_performance_metrics, calculate_returns, fetch_data, identify_breakouts
+
+    grid = grid or DEFAULT_GRID
+    if data is None:
+        data = fetch_data(ticker, start_date, end_date)
+    alive = pd.DataFrame(
+        [(v, p, h, w) for v in grid['volume_thresholds'] for p in grid['price_changes']
+         for h in grid['holding_periods'] for w in grid['waiting_periods']],
+        columns=PARAMETER_COLUMNS).astype({'Volume Threshold (%)': float, 'Price Change (%)': float,
+                                           'Holding Period': int, 'Waiting Period': int})
+    history = pd.DataFrame(index=alive.index, columns=[], dtype=float)
+
+    rows = []
+    for fold, (train_start, train_end, test_end) in enumerate(walk_forward_folds(len(data), train_bars, test_bars)):
+        scored = _train_scores(data.iloc[train_start:train_end], alive)
+        score = scored['Average Return (%)'].where(scored['Total Trades'] >= min_trades).to_numpy()
+        history[fold] = pd.Series(score, index=alive.index)
+
+        if np.isnan(score).all():
+            continue
+        best = alive.iloc[int(np.nanargmax(score))]
+
+        # Signals need the preceding bars for the 20-day average; only test-window
+        # breakouts are traded and every exit must fall inside the test window.
+        window = data.iloc[train_start:test_end].copy()
+        breakout_days = identify_breakouts(window, best['Volume Threshold (%)'], best['Price Change (%)'])
+        breakout_days = breakout_days[breakout_days.index >= data.index[train_end]]
+        results = calculate_returns(window, breakout_days, int(best['Holding Period']),
+                                    int(best['Waiting Period']), "Walk-Forward")
+        metrics = calculate_performance_metrics(results) if not results.empty else {"Total Trades": 0}
+
+        rows.append({
+            'Ticker': ticker,
+            'Fold': fold,
+            'Train Start': data.index[train_start].date(),
+            'Test Start': data.index[train_end].date(),
+            'Test End': data.index[test_end - 1].date(),
+            **best.to_dict(),
+            'Train Average Return (%)': float(np.nanmax(score)),
+            **metrics,
+            'Parameter Sets Alive': len(alive),
+        })
+
+        if fold + 1 >= prune_after:
+            mean_score = history.mean(axis=1, skipna=True)
+            losing = (mean_score < 0) & (mean_score < mean_score.median())
+            if losing.sum() < len(alive):
+                alive = alive[~losing.to_numpy()].reset_index(drop=True)
+                history = history[~losing.to_numpy()].reset_index(drop=True)
+
+    return pd.DataFrame(rows)
+
+
+def walk_forward(tickers: list, start_date: str, end_date: str, grid: dict = None, train_bars: int = 504,
+                 test_bars: int = 126, min_trades: int = 5, prune_after: int = 3, max_workers: int = None) -> pd.DataFrame:
+    """Run walk_forward_ticker for every ticker across a process pool and stack the folds.
+
+    Prices are fetched here, so every download shares this process's provider
+    rate limit; workers only get the frames.
+    """
+    from providers import get_provider
+
+    prices = get_provider().fetch_many(tickers, start_date, end_date)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context) as pool:
+        futures = {ticker: pool.submit(walk_forward_ticker, ticker, start_date, end_date, grid, train_bars,
+                                       test_bars, min_trades, prune_after, data)
+                   for ticker, data in prices.items()}
+        for ticker, future in futures.items():
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error in walk-forward for {ticker}: {e}")
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+def summarize_walk_forward(folds: pd.DataFrame) -> pd.DataFrame:
+    """Out-of-sample totals per ticker, weighting fold averages by their trade counts."""
+    traded = folds[folds['Total Trades'] > 0].copy()
+    traded['Return Sum'] = traded['Average Return (%)'] * traded['Total Trades']
+    summary = traded.groupby('Ticker').agg(**{
+        'Folds': ('Fold', 'count'),
+        'Total Trades': ('Total Trades', 'sum'),
+        'Winning Trades': ('Winning Trades', 'sum'),
+        'Return Sum': ('Return Sum', 'sum'),
+    })
+    summary['Win Rate (%)'] = summary['Winning Trades'] / summary['Total Trades'] * 100
+    summary['Average Return (%)'] = summary['Return Sum'] / summary['Total Trades']
+    return summary.drop(columns='Return Sum')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation of the breakout parameters.")
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--train-bars', type=int, default=504)
+    parser.add_argument('--test-bars', type=int, default=126)
+    parser.add_argument('--min-trades', type=int, default=5)
+    parser.add_argument('--prune-after', type=int, default=3)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="Write the per-fold results to this CSV file")
+    args = parser.parse_args()
+
+    folds = walk_forward(args.tickers, args.start_date, args.end_date, None, args.train_bars, args.test_bars,
+                         args.min_trades, args.prune_after, args.workers)
+    if folds.empty:
+        print("No walk-forward folds produced")
+        return
+    print(summarize_walk_forward(folds).to_string(float_format="%.2f"))
+    if args.output:
+        folds.to_csv(args.output, index=False, float_format="%.4f")
+
+
+if __name__ == '__main__':
+    main()